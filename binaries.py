@@ -0,0 +1,77 @@
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+#
+# Authors:
+# Caner Candan <caner@candan.fr>, http://caner.candan.fr
+#
+
+"""
+Content-addressed store of the binaries. Each binary is copied once into the store of the working directory (WORKDIR/Bin), under the SHA-256 of its content, then hard linked into the directory of the campaign. The campaigns of a working directory thus share a single copy of every identical binary, and the digest recorded with each run tells which binary produced it.
+"""
+
+import hashlib, os, shutil
+
+def sha256(filename):
+    h = hashlib.sha256()
+
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+
+    return h.hexdigest()
+
+class Store:
+    def __init__(self, dirname):
+        self.dirname = dirname
+        self.digests = {}
+
+    def digest(self, filename):
+        """
+        Return the SHA-256 of a file. The digests are kept by inode, size and modification time, so a binary is only read again when it changes.
+        """
+
+        st = os.stat(filename)
+        key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+        if key not in self.digests:
+            self.digests[key] = sha256(filename)
+
+        return self.digests[key]
+
+    def stage(self, filename, dirname):
+        """
+        Put a binary into the store if it is not there yet and link it into the directory 'dirname' under its own name. Return its digest.
+        """
+
+        digest = self.digest(filename)
+        stored = os.path.join(self.dirname, digest)
+        target = os.path.join(dirname, os.path.basename(filename))
+
+        if not os.path.exists(stored):
+            os.makedirs(self.dirname, exist_ok=True)
+            shutil.copy2(filename, '%s.%d' % (stored, os.getpid()))
+            os.replace('%s.%d' % (stored, os.getpid()), stored)
+
+        if os.path.exists(target) and os.path.samefile(stored, target):
+            return digest
+
+        try:
+            os.link(stored, '%s.%d' % (target, os.getpid()))
+        except OSError:
+            # another file system, the binary is copied instead
+            shutil.copy2(stored, '%s.%d' % (target, os.getpid()))
+
+        os.replace('%s.%d' % (target, os.getpid()), target)
+
+        return digest
@@ -20,15 +20,19 @@
 Browser classes enable to choose the order of experiences you want to test. Sometimes it is useful to define priorities for each test in order to get faster the results wished. This is mainly the case when you have a long waiting time.
 """
 
-import optparse, logging, sys, os, subprocess, shutil
+import optparse, logging, sys, os, re, shlex, subprocess, shutil
 from datetime import datetime
-import common
+import common, executors, spaces
 
 class Browser(common.Base):
     """
     Base class for Browser classes
+
+    A browser binds the keys listed in 'keys' to each of the tuples of values returned by its method 'bindings', then calls the browsers below it. The browsers having no keys are called once.
     """
 
+    keys = ()
+
     def __init__(self, parser, browser=None, stat=None, tracer=None):
         common.Base.__init__(self, parser)
 
@@ -97,11 +101,76 @@ class Browser(common.Base):
         self.browsers += browsers
         return self
 
+    def browse(self, options, tree):
+        for _ in self.space(tree):
+            self.browseAll(tree)
+
+    def bindings(self, tree):
+        """
+        Return the tuples of values taken in turn by the keys of the browser.
+        """
+
+        return [()]
+
+    def below(self):
+        """
+        Return the keys bound by the browsers below this one.
+        """
+
+        keys = set()
+        for browser in self.browsers:
+            keys.update(browser.keys)
+            keys.update(browser.below())
+
+        return keys
+
+    def reaches(self, kind):
+        """
+        Tell whether a browser of the class 'kind' is found below this one.
+        """
+
+        return any(isinstance(browser, kind) or browser.reaches(kind) for browser in self.browsers)
+
+    def checks(self, tree):
+        """
+        Return the constraints to check here, those binding here the last of their keys.
+        """
+
+        if not tree['CONSTRAINTS']: return []
+
+        below = self.below()
+        checks = []
+
+        for expression in tree['CONSTRAINTS']:
+            constraint = spaces.constraint(expression)
+            if constraint.names & set(self.keys) and not constraint.names & below:
+                checks.append(constraint)
+
+        return checks
+
+    def space(self, tree):
+        """
+        Bind in turn each tuple of values of the keys into the tree, the ones violating a constraint being skipped.
+        """
+
+        checks = self.checks(tree) if self.keys else []
+
+        for values in self.bindings(tree):
+            for key, value in zip(self.keys, values):
+                tree[key] = value
+
+            if all(check(tree) for check in checks):
+                yield values
+
     def browseAll(self, tree):
         for browser in self.browsers:
             browser(tree)
 
     def statAll(self, tree):
+        # the stats read the files written by the runs, they have to be finished
+        if self.stats and tree['PLOT'] and tree['EXECUTOR']:
+            tree['EXECUTOR'].join()
+
         for stat in self.stats:
             stat(tree)
 
@@ -110,145 +179,286 @@ class Browser(common.Base):
             tracer(tree)
 
 class Sample(Browser):
+    keys = ('INSTANCE',)
+
     def __init__(self, parser, browser=None):
         Browser.__init__(self, parser, browser)
 
-    def browse(self, options, tree):
-        tree['PROGRESSBAR_SIZE'] *= len(tree['SAMPLES'])
-
-        for tree['INSTANCE'] in tree['SAMPLES']:
-            self.browseAll(tree)
+    def bindings(self, tree):
+        return [(sample,) for sample in tree['SAMPLES']]
 
 class Generation(Browser):
+    keys = ('GENMAX',)
+
     def __init__(self, parser, browser=None):
         Browser.__init__(self, parser, browser)
 
-    def browse(self, options, tree):
-        tree['PROGRESSBAR_SIZE'] *= len(tree['GENERATIONS'])
-
-        for tree['GENMAX'] in tree['GENERATIONS']:
-            self.browseAll(tree)
+    def bindings(self, tree):
+        return [(genmax,) for genmax in tree['GENERATIONS']]
 
 class Pop(Browser):
+    keys = ('POPSIZE',)
+
     def __init__(self, parser, browser=None):
         Browser.__init__(self, parser, browser)
 
-    def browse(self, options, tree):
-        tree['PROGRESSBAR_SIZE'] *= len(tree['POPSIZES'])
-
-        for tree['POPSIZE'] in tree['POPSIZES']:
-            self.browseAll(tree)
+    def bindings(self, tree):
+        return [(popsize,) for popsize in tree['POPSIZES']]
 
 class Core(Browser):
+    keys = ('CORESIZE',)
+
     def __init__(self, parser, browser=None):
         Browser.__init__(self, parser, browser)
 
-    def browse(self, options, tree):
-        tree['PROGRESSBAR_SIZE'] *= len(tree['CORESIZES']) * 2  # temporary patch, taking in account the sequential execution, has to be changed
-
-        for tree['CORESIZE'] in tree['CORESIZES']:
-            self.browseAll(tree)
+    def bindings(self, tree):
+        return [(coresize,) for coresize in tree['CORESIZES']]
 
 class Sequential(Browser):
+    keys = ('CORESIZE', 'PARALLELIZE')
+
     def __init__(self, parser, browser=None):
         Browser.__init__(self, parser, browser)
 
-    def browse(self, options, tree):
-        tree['PROGRESSBAR_SIZE'] *= 2
-
-        tree['CORESIZE'] = 1
-        tree['PARALLELIZE'] = False
-
-        self.browseAll(tree)
+    def bindings(self, tree):
+        return [(1, False)]
 
 class Restart(Browser):
+    keys = ('FIELD', 'RUNMAX', 'TIMEOUT_COMMAND')
+
     def __init__(self, parser, browser=None):
         Browser.__init__(self, parser, browser)
 
-    def browse(self, options, tree):
-        tree['FIELD'] = 'RESTART' if tree['RESTART'] else ''
-        tree['RUNMAX'] = 0 if tree['RESTART'] else 1
-        # tree['TIMELIMIT_COMMAND'] = '%(TIMELIMIT_COMMAND_PATTERN)s' % tree % tree if tree['RESTART'] else ''
-        tree['TIMEOUT_COMMAND'] = '%(TIMEOUT_COMMAND_PATTERN)s' % tree % tree if tree['RESTART'] else ''
+    def bindings(self, tree):
+        # tree['TIMELIMIT_COMMAND'] = common.expand(tree, 'TIMELIMIT_COMMAND_PATTERN') if tree['RESTART'] else ''
+        if tree['RESTART']:
+            return [('RESTART', 0, common.expand(tree, 'TIMEOUT_COMMAND_PATTERN'))]
 
-        self.browseAll(tree)
+        return [('', 1, '')]
 
 class Starting(Browser):
+    keys = ('FIELD', 'RUNMAX', 'TIMEOUT_COMMAND')
+
     def __init__(self, parser, browser=None):
         Browser.__init__(self, parser, browser)
 
-    def browse(self, options, tree):
-        tree['PROGRESSBAR_SIZE'] *= 2
-
+    def bindings(self, tree):
         # for tree['FIELD'], tree['RUNMAX'], tree['TIMELIMIT_COMMAND'] in [
-        for tree['FIELD'], tree['RUNMAX'], tree['TIMEOUT_COMMAND'] in [
+        return [
             ('', 1, ''),
-            # ('RESTART', 0, '%(TIMELIMIT_COMMAND_PATTERN)s' % tree % tree)
-            ('RESTART', 0, '%(TIMEOUT_COMMAND_PATTERN)s' % tree % tree)
-            ]:
-            self.browseAll(tree)
+            # ('RESTART', 0, common.expand(tree, 'TIMELIMIT_COMMAND_PATTERN'))
+            ('RESTART', 0, common.expand(tree, 'TIMEOUT_COMMAND_PATTERN'))
+            ]
 
 class Dynamic(Browser):
+    keys = ('SCHEMA', 'SCHEMABOOL')
+
     def __init__(self, parser, browser=None):
         Browser.__init__(self, parser, browser)
 
-    def browse(self, options, tree):
-        tree['SCHEMA'] = 'DYNAMIC' if tree['DYNAMIC'] else 'STATIC'
-        tree['SCHEMABOOL'] = tree['DYNAMIC']
-
-        self.browseAll(tree)
+    def bindings(self, tree):
+        return [('DYNAMIC' if tree['DYNAMIC'] else 'STATIC', tree['DYNAMIC'])]
 
 class Schema(Browser):
+    keys = ('SCHEMA', 'SCHEMABOOL')
+
     def __init__(self, parser, browser=None):
         Browser.__init__(self, parser, browser)
 
-    def browse(self, options, tree):
-        tree['PROGRESSBAR_SIZE'] *= 2
-
-        for tree['SCHEMA'], tree['SCHEMABOOL'] in [('STATIC', 0), ('DYNAMIC', 1)]:
-            self.browseAll(tree)
+    def bindings(self, tree):
+        return [('STATIC', 0), ('DYNAMIC', 1)]
 
 class Command(Browser):
+    keys = ('COMMAND', 'COMMAND_SHA256')
+
     def __init__(self, parser, browser=None):
         Browser.__init__(self, parser, browser)
 
+    def bindings(self, tree):
+        """
+        Return each binary along with its digest, known when the binaries are stored (see binaries), an empty string otherwise.
+        """
+
+        bindings = []
+
+        for command in tree['BINARIES']:
+            binary = '%s/%s' % (tree['BINARYPATH'], command)
+            bindings.append((command, tree['STORE'].digest(binary) if tree['STORE'] and os.path.isfile(binary) else ''))
+
+        return bindings
+
     def browse(self, options, tree):
-        tree['PROGRESSBAR_SIZE'] *= len(tree['BINARIES'])
+        for _ in self.space(tree):
+            binary = '%(BINARYPATH)s/%(COMMAND)s' % tree
 
-        for tree['COMMAND'] in tree['BINARIES']:
-            if tree['EXECUTE']:
-                shutil.copy('%(BINARYPATH)s/%(COMMAND)s' % tree, '%(MAKEXPDIR)s/' % tree)
+            if tree['EXECUTE'] and tree['STORE']:
+                tree['COMMAND_SHA256'] = tree['STORE'].stage(binary, tree['MAKEXPDIR'])
+            elif tree['EXECUTE']:
+                shutil.copy(binary, '%(MAKEXPDIR)s/' % tree)
 
             self.browseAll(tree)
 
 class Range(Browser):
+    keys = ('NUM',)
+
     def __init__(self, parser, browser=None):
         Browser.__init__(self, parser, browser)
 
-    def browse(self, options, tree):
-        tree['PROGRESSBAR_SIZE'] *= tree['NRUNS']
-
-        for tree['NUM'] in range(1, tree['NRUNS']+1):
-            self.browseAll(tree)
+    def bindings(self, tree):
+        return [(num,) for num in range(1, tree['NRUNS']+1)]
 
 class Execute(Browser):
     def __init__(self, parser, stat=None):
         Browser.__init__(self, parser, stat=stat)
 
+        self.patterns = ['MANGLENAME_PATTERN', 'TIMEFILENAME_PATTERN', 'RESFILENAME_PATTERN', 'PLANFILENAME_PATTERN',
+                         'COMMAND_PATTERN', 'TIMEOUT_COMMAND_PATTERN', 'STDOUT_PATTERN', 'STDERR_PATTERN', 'CELL_PATTERN']
+        self.jobkeys = ['NAME', 'MANGLENAME', 'NUM', 'CORESIZE', 'CELL',
+                        'RES_FILENAME', 'TIME_FILENAME', 'PLAN_FILENAME',
+                        'PROCESS_COMMAND', 'PROCESS_ARGV', 'STDOUT', 'STDERR', 'ENV', 'COMPRESS',
+                        'RUN_TIMEOUT', 'RESTART']
+        self.paramkeys = {}
+        self.argvs = {}
+
     def browse(self, options, tree):
-        tree['MANGLENAME'] = '%(MANGLENAME_PATTERN)s' % tree % tree
-        tree['TIME_FILENAME'] = '%(TIMEFILENAME_PATTERN)s' % tree % tree
-        tree['RES_FILENAME'] = '%(RESFILENAME_PATTERN)s' % tree % tree
-        tree['PROCESS_COMMAND'] = '%(COMMAND_PATTERN)s' % tree % tree
+        self.format(tree)
 
-        self.logger.debug('%(PROCESS_COMMAND)s' % tree)
+        self.logger.debug('%s', tree['PROCESS_COMMAND'])
 
         if tree['EXECUTE']:
-            p = subprocess.Popen('%(PROCESS_COMMAND)s' % tree, shell=True)
-            p.wait()
+            job = self.job(tree)
+
+            if tree['SHARD'] and job['RES_FILENAME'] not in tree['SHARD']:
+                self.logger.debug('%(RES_FILENAME)s belongs to another shard' % tree)
+            elif tree['COMPLETED'] and job in tree['COMPLETED']:
+                self.logger.debug('%(RES_FILENAME)s is already completed' % tree)
+            elif tree['EXECUTOR']:
+                if tree['JOURNAL']: tree['JOURNAL'].queued(job, self.params(tree))
+                tree['EXECUTOR'].submit(job)
+            else:
+                executors.run(job)
 
         self.browseAll(tree)
 
+    def format(self, tree):
+        """
+        Format into the tree the keys of the run: its names, its files and its command.
+        """
+
+        tree['MANGLENAME'] = common.expand(tree, 'MANGLENAME_PATTERN')
+        tree['TIME_FILENAME'] = common.expand(tree, 'TIMEFILENAME_PATTERN')
+        tree['RES_FILENAME'] = common.expand(tree, 'RESFILENAME_PATTERN')
+        tree['PLAN_FILENAME'] = common.expand(tree, 'PLANFILENAME_PATTERN')
+        tree['CELL'] = common.expand(tree, 'CELL_PATTERN')
+
+        if tree['EXECUTOR'] and tree['EXECUTOR'].timeouts and tree['TIMEOUT_COMMAND']:
+            # the executor enforces the timeout itself, no need to wrap the command
+            tree['TIMEOUT_COMMAND'] = ''
+            tree['RUN_TIMEOUT'] = tree['TIMEOUT']
+
+        if tree['COMMAND_ARGV_PATTERN']:
+            tree['TIMEOUT_ARGV'] = list(common.split(tree['TIMEOUT_COMMAND']))
+            tree['PROCESS_ARGV'] = self.argv(tree)
+            tree['STDOUT'] = common.expand(tree, 'STDOUT_PATTERN')
+            if tree['STDOUT'] and tree['COMPRESS']: tree['STDOUT'] += common.COMPRESSORS[tree['COMPRESS']][0]
+            tree['STDERR'] = common.expand(tree, 'STDERR_PATTERN')
+            tree['PROCESS_COMMAND'] = common.join(tree['PROCESS_ARGV'])
+            if tree['STDERR']: tree['PROCESS_COMMAND'] += ' 2> %s' % shlex.quote(tree['STDERR'])
+            if tree['STDOUT'] and tree['COMPRESS']: tree['PROCESS_COMMAND'] += ' | %s' % common.join(common.COMPRESSORS[tree['COMPRESS']][1])
+            if tree['STDOUT']: tree['PROCESS_COMMAND'] += ' > %s' % shlex.quote(tree['STDOUT'])
+        else:
+            tree['PROCESS_COMMAND'] = common.expand(tree, 'COMMAND_PATTERN')
+
+    def compiler(self, tree):
+        """
+        Return a function giving the job and the parameters of a run from the keys bound above this browser (see spaces.Space.reach): a dictionary of the keys bound by the last browser having keys, and a dictionary of the other ones, the same object for all the runs of a cell. The run is formatted by format, as browse does, but over a plain dictionary: the tree is flattened once, then once per cell, so the keys of a run are not looked up through the chain of scopes. The keys read by format, job and paramnames that are missing from the tree give an empty string, as they do in the tree.
+        """
+
+        constants = dict.fromkeys(self.jobkeys + self.patterns + ['EXECUTOR', 'TIMEOUT_COMMAND', 'COMMAND_ARGV_PATTERN', 'COMPRESS', 'COMMAND_SHA256'], '')
+        constants.update((key, tree[key]) for key in tree)
+
+        patterns = set(self.patterns + ['COMMAND_ARGV_PATTERN'])
+
+        # the last cell, along with the constants and the names of the parameters as long as the runs do not bind any pattern
+        last = [None, None, None]
+
+        def compiled(cell, bound):
+            if last[0] is not cell:
+                formatted = dict(constants, **cell)
+                last[:] = [cell, formatted, self.paramnames(formatted)]
+
+            run = dict(last[1])
+            run.update(bound)
+
+            self.format(run)
+            return self.job(run), self.params(run, last[2] if patterns.isdisjoint(bound) else None)
+
+        return compiled
+
+    def argv(self, tree):
+        """
+        Format each argument of COMMAND_ARGV_PATTERN, the empty ones being dropped. An argument only made of a reference to a list, like '%(TIMEOUT_ARGV)s', is replaced by the items of that list. The arguments in a row which are not references are formatted at once, joined by a null character, which no argument can hold.
+        """
+
+        patterns = tuple(tree['COMMAND_ARGV_PATTERN'])
+
+        if patterns not in self.argvs:
+            groups = []
+
+            for pattern in patterns:
+                template = common.template(pattern)
+
+                if template.reference:
+                    groups.append((template.reference, template))
+                elif groups and groups[-1][0] is None:
+                    groups[-1] = (None, groups[-1][1] + [pattern])
+                else:
+                    groups.append((None, [pattern]))
+
+            self.argvs[patterns] = [(reference, group if reference else common.template('\0'.join(group))) for reference, group in groups]
+
+        argv = []
+
+        for reference, template in self.argvs[patterns]:
+            if reference:
+                value = tree.get(reference)
+                if isinstance(value, list):
+                    argv += value
+                    continue
+
+            argv += [arg for arg in template(tree).split('\0') if arg]
+
+        return argv
+
+    def job(self, tree):
+        """
+        Return the job to give to the executor, only the keys needed to launch the run are kept.
+        """
+
+        return {key: tree[key] for key in self.jobkeys}
+
+    def params(self, tree, names=None):
+        """
+        Return the parameters of the run, that is the keys used by the patterns formatted here, the job keys aside, and the digest of the binary. The names of these keys may be given when they are already known (see paramnames).
+        """
+
+        params = {key: tree[key] for key in (self.paramnames(tree) if names is None else names)}
+        if tree['COMMAND_SHA256']: params['COMMAND_SHA256'] = tree['COMMAND_SHA256']
+
+        return params
+
+    def paramnames(self, tree):
+        """
+        Return the keys used by the patterns of the tree, the job keys aside.
+        """
+
+        patterns = tuple([tree[key] for key in self.patterns]) + tuple(tree['COMMAND_ARGV_PATTERN'] or ())
+
+        if patterns not in self.paramkeys:
+            self.paramkeys[patterns] = sorted(set(re.findall(r'%\((\w+)\)', ''.join(patterns))) - set(self.jobkeys))
+
+        return self.paramkeys[patterns]
+
 class ProgressBar(Browser):
     def __init__(self, parser, stat=None):
         Browser.__init__(self, parser, stat=stat)
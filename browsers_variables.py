@@ -24,7 +24,7 @@ Browser classes enable to choose the order of experiences you want to test. Some
 
 import optparse, logging, sys, os, subprocess, shutil
 from datetime import datetime
-import common
+import common, executors, resume, journal, plans, binaries, spaces, progress, solutions, cache
 import browsers
 from browsers import *
 
@@ -43,7 +43,11 @@ class Do(Browser):
 
         parser.add_option('-w', '--working_directory', dest='workdir', default=workdir, help='Working directory where the experiments will be done.')
         parser.add_option('-c', '--compare_with', dest='other_workdir', default=other_workdir, help='Another working directory to compare with the current one.')
-
+        parser.add_option('--plan', action='store_true', default=False, help='Print the plan of the jobs as JSON lines instead of running them.')
+        parser.add_option('--plan-output', dest='plan_output', default=None, help='Write the plan into this file instead of the standard output.')
+        parser.add_option('--shard', default=None, help='Only run the shard I/N of the jobs, the shards being balanced by estimated cost.')
+        parser.add_option('--shard-durations', dest='shard_durations', default=None, help='Balance the shards with the durations of this snapshot, the same file on every node (see journal.py --durations).')
+        parser.add_option('--merge', default=None, help='Comma separated working directories of shards to gather into the working directory.')
 
     def browse(self, options, tree):
         if not options.workdir:
@@ -61,6 +65,7 @@ class Do(Browser):
                 'SEQ_MANGLENAME_PATTERN': '%(FIELD)s_%(COMMAND)s_%(SCHEMA)s_S%(POPSIZE)d_C1',
                 'TIMEFILENAME_PATTERN': '%(TIMEDIR)s/%(NAME)s_%(MANGLENAME)s.time.%(NUM)s',
                 'RESFILENAME_PATTERN': '%(RESDIR)s/%(NAME)s_%(MANGLENAME)s.out.%(NUM)s',
+                'PLANFILENAME_PATTERN': '%(RESDIR)s/%(NAME)s_%(MANGLENAME)s.soln.%(NUM)s',
                 'STATFILENAME_PATTERN': '%(STATDIR)s/%(TITLE)s_%(NAME)s_%(MANGLENAME)s.stat',
                 'GRAPHFILENAME_PATTERN': '%(STATDIR)s/%(TITLE)s_%(NAME)s_%(MANGLENAME)s.data',
                 'SEQ_RESFILENAME_PATTERN': '%(RESDIR)s/%(NAME)s_%(SEQ_MANGLENAME)s.out.%(NUM)s',
@@ -88,12 +93,34 @@ class Do(Browser):
                     '--status=%(RES_FILENAME)s.status '\
                     '> %(RES_FILENAME)s',
 
+                # when given, the list of the arguments of the command, run without any shell
+                'COMMAND_ARGV_PATTERN': None,
+                'STDOUT_PATTERN': '%(RES_FILENAME)s',
+                'STDERR_PATTERN': '',
+                'ENV': {},
+                # compress the standard output of the runs given with COMMAND_ARGV_PATTERN: 'zstd', 'gzip', or True for zstd when available
+                'COMPRESS': False,
+                # run each job in its own scratch directory under this one, or True for /dev/shm or $TMPDIR
+                'SCRATCH': False,
+                # the runs sharing the same memory needs, for the admission control
+                'CELL_PATTERN': '%(COMMAND)s/%(POPSIZE)s/%(CORESIZE)s',
+
                 'RESDIR_PATTERN': '%(WORKDIR)s/Res',
                 'TIMEDIR_PATTERN': '%(WORKDIR)s/Time',
                 'STATDIR_PATTERN': '%(WORKDIR)s/Stat',
                 'MAKEXPDIR_PATTERN': '%(WORKDIR)s/makexp_%(DATENAME)s',
+                'BINDIR_PATTERN': '%(WORKDIR)s/Bin',
                 'GRAPHDIR_PATTERN': '%(WORKDIR)s/graph_%(DATENAME)s',
 
+                # set by the browsers, empty when none of them is used
+                'NAME': '',
+                'DOMAIN': '',
+                'FIELD': '',
+                'TIMEOUT_COMMAND': '',
+
+                # Python expressions over the keys removing the configurations not wanted, like 'CORESIZE <= POPSIZE'
+                'CONSTRAINTS': [],
+
                 'SAMPLES': [],
                 'NRUNS': 1,
                 'POPSIZES': [],
@@ -107,6 +134,26 @@ class Do(Browser):
                 'EXECUTE': False,
                 'PLOT': False,
                 'PLOT_ON_WINDOW': False,
+                'MAX_PARALLEL_JOBS': 1,
+                'PIN_CORES': False,
+                'ADMISSION': False,
+                # kbytes of memory the admission control keeps free
+                'MEMORY_MARGIN': 262144,
+                'RESUME': False,
+                'JOURNAL': False,
+                'PROGRESS': False,
+                'PROGRESS_INTERVAL': 30,
+                # link the file of suffix 'last' of every run to its last solution after the execution
+                'LAST_LINKS': True,
+                # keep the values of the stats, computed again only for the cells whose files changed
+                'STATS_CACHE': True,
+                'COORDINATOR': False,
+                'COORDINATOR_ADDRESS': ('127.0.0.1', 0),
+                'GRID_ENGINE': False,
+                'QSUB': 'qsub',
+                'QSTAT': 'qstat',
+                'QSUB_PE': 'smp',
+                'QSTAT_INTERVAL': 30,
                 'PARALLELIZE': True,
                 'SEED': 0,
                 'RUNMAX': 0,
@@ -115,6 +162,7 @@ class Do(Browser):
                 'GENMAX': 1000,
                 # 'TIMELIMIT': 1800,
                 'TIMEOUT': 1800,
+                'TIMEOUT_GRACE': 10,
 
                 'TITLE': None,
                 'XLABEL': None,
@@ -131,11 +179,12 @@ class Do(Browser):
             t.update(d)
 
         def filltree(t):
-            t['RESDIR'] = '%(RESDIR_PATTERN)s' % t % t
-            t['TIMEDIR'] = '%(TIMEDIR_PATTERN)s' % t % t
-            t['STATDIR'] = '%(STATDIR_PATTERN)s' % t % t
-            t['MAKEXPDIR'] = '%(MAKEXPDIR_PATTERN)s' % t % t
-            t['GRAPHDIR'] = '%(GRAPHDIR_PATTERN)s' % t % t
+            t['RESDIR'] = common.expand(t, 'RESDIR_PATTERN')
+            t['TIMEDIR'] = common.expand(t, 'TIMEDIR_PATTERN')
+            t['STATDIR'] = common.expand(t, 'STATDIR_PATTERN')
+            t['MAKEXPDIR'] = common.expand(t, 'MAKEXPDIR_PATTERN')
+            t['BINDIR'] = common.expand(t, 'BINDIR_PATTERN')
+            t['GRAPHDIR'] = common.expand(t, 'GRAPHDIR_PATTERN')
 
         tree['WORKDIR'] = options.workdir
         tree['OTHER_WORKDIR'] = options.other_workdir
@@ -160,6 +209,25 @@ class Do(Browser):
             otree.update(eval(''.join(open('%(WORKDIR)s/variables.py' % otree).readlines())))
             filltree(otree)
 
+        tree['STORE'] = binaries.Store(tree['BINDIR'])
+        tree['COMPRESS'] = common.compressor(tree['COMPRESS'])
+
+        if tree['COMPRESS'] and not tree['COMMAND_ARGV_PATTERN']:
+            raise ValueError('COMPRESS needs COMMAND_ARGV_PATTERN, the output of a COMMAND_PATTERN being redirected by its own command line')
+
+        # a constraint naming no key bound by a browser is checked once, here, so a misspelled key raises a NameError rather than turning it off
+        below = self.below()
+        for expression in tree['CONSTRAINTS'] or []:
+            constraint = spaces.constraint(expression)
+            if not constraint.names & below and not constraint(tree):
+                self.logger.warning('the constraint %s rules out every configuration' % expression)
+                return
+
+        if options.plan:
+            plan = self.compile(tree)
+            plan.write(open(options.plan_output, 'w') if options.plan_output else sys.stdout)
+            return
+
         # create needed directories
         if tree['EXECUTE']:
             for key in ['RESDIR', 'TIMEDIR', 'STATDIR', 'MAKEXPDIR']: makedirs(tree[key])
@@ -169,7 +237,8 @@ class Do(Browser):
                       'browsers.py', 'browsers_options.py', 'browsers_variables.py',
                       'stats.py', 'stats_options.py', 'stats_variables.py',
                       'tracers.py', 'tracers_options.py', 'tracers_variables.py',
-                      'common.py', 'parser.py'
+                      'common.py', 'parser.py', 'executors.py', 'resume.py', 'journal.py', 'plans.py', 'records.py',
+                      'binaries.py', 'spaces.py', 'progress.py', 'metrics.py', 'solutions.py', 'cache.py',
                       ]:
                 print("%s/%s" % (dirname, f), "%(MAKEXPDIR)s/" % tree)
                 shutil.copy("%s/%s" % (dirname, f), "%(MAKEXPDIR)s/" % tree)
@@ -181,6 +250,98 @@ class Do(Browser):
             self.logger.error('The working directory %(WORKDIR)s doesnot exist.' % tree)
             return
 
-        if tree['PLOT']: makedirs(tree['GRAPHDIR'])
+        if tree['PLOT']:
+            for key in ['STATDIR', 'GRAPHDIR']: makedirs(tree[key])
+
+        tree['STATS'] = cache.Cache('%(WORKDIR)s/stats.db' % tree) if tree['PLOT'] and tree['STATS_CACHE'] else None
+        tree['JOURNAL'] = journal.Journal('%(WORKDIR)s/journal.db' % tree) if tree['JOURNAL'] else None
+
+        # the index of the solutions follows the runs reported by the executor, which it forwards to the journal
+        tree['SOLUTIONS'] = solutions.Index(tree['RESDIR'], '%(WORKDIR)s/solutions.json' % tree, tree['JOURNAL']) if tree['PLOT'] or (tree['EXECUTE'] and tree['LAST_LINKS']) else None
+
+        tree['EXECUTOR'] = None
+        tree['COMPLETED'] = None
+        if tree['EXECUTE']:
+            if tree['RESUME']:
+                tree['COMPLETED'] = resume.Completed(tree['RESDIR'], tree['TIMEDIR'], tree['JOURNAL'])
+
+            plan = self.compile(tree) if options.shard or tree['PROGRESS'] else None
+            durations = tree['JOURNAL'].durations() if tree['JOURNAL'] else {}
+
+            if options.shard:
+                index, count = [int(x) for x in options.shard.split('/')]
+                # the partition must be the same on every node, so the local journal is not used
+                snapshot = plans.durations(open(options.shard_durations)) if options.shard_durations else {}
+                tree['SHARD'] = plans.shard(plan, index, count, snapshot)
+
+            # the executor reports the jobs started and finished to the progress, which forwards them to the index of the solutions and the journal
+            listener = tree['SOLUTIONS'] or tree['JOURNAL']
+            if tree['PROGRESS']:
+                jobs = [job for job in plan if not (tree['SHARD'] and job['RES_FILENAME'] not in tree['SHARD']) and not (tree['COMPLETED'] and job in tree['COMPLETED'])]
+                costs = dict(zip([job['RES_FILENAME'] for job in jobs], plans.costs(jobs, durations)))
+                tree['PROGRESS'] = listener = progress.Progress(costs, '%(WORKDIR)s/progress.json' % tree, tree['PROGRESS_INTERVAL'], listener)
+
+            if tree['GRID_ENGINE']:
+                tree['EXECUTOR'] = executors.GridEngine('%(MAKEXPDIR)s/qsub' % tree, tree['QSUB'], tree['QSTAT'], tree['QSUB_PE'], tree['QSTAT_INTERVAL'], listener)
+            elif tree['COORDINATOR']:
+                tree['EXECUTOR'] = executors.Coordinator(tree['MAX_PARALLEL_JOBS'], tree['COORDINATOR_ADDRESS'], os.environ.get('MAKEXP_AUTHKEY', 'makexp').encode(), tree['TIMEOUT_GRACE'], listener)
+            else:
+                admission = executors.Admission(len(executors.cpus()), tree['MEMORY_MARGIN']) if tree['ADMISSION'] else None
+                scratch = executors.Scratch(executors.scratchroot(tree['SCRATCH']), [tree['RESDIR'], tree['TIMEDIR']]) if tree['SCRATCH'] else None
+
+                if tree['PIN_CORES']:
+                    # MAX_PARALLEL_JOBS left at 1, its default, would run the pinned runs one at a time: the cores reserved bound them instead
+                    tree['EXECUTOR'] = executors.Cores(executors.cpus(), tree['MAX_PARALLEL_JOBS'] if tree['MAX_PARALLEL_JOBS'] > 1 else None, tree['TIMEOUT_GRACE'], listener, admission, scratch)
+                else:
+                    tree['EXECUTOR'] = executors.Pool(tree['MAX_PARALLEL_JOBS'], tree['TIMEOUT_GRACE'], listener, admission, scratch)
+
+        if options.merge:
+            plans.merge(options.merge.split(','), tree)
+
+        # the number of configurations reaching the progress bar, the constraints taken into account, the space being only walked for one
+        if self.reaches(browsers.ProgressBar):
+            tree['PROGRESSBAR_SIZE'] = len(spaces.Space(self, tree).reach(browsers.ProgressBar))
+
+        if tree['EXECUTOR'] and tree['PLOT']:
+            # all the runs are executed first, then the stats read their files in a pass of their own, so the executor never waits for the stats of a cell
+            execution = tree.copy()
+            execution['PLOT'] = False
+            self.browseAll(execution)
+            self.finish(tree)
+
+            tree['EXECUTE'] = False
+            tree['EXECUTOR'] = None
+            self.browseAll(tree)
+        else:
+            self.browseAll(tree)
+            if tree['EXECUTOR']: self.finish(tree)
+
+        if tree['SOLUTIONS']: tree['SOLUTIONS'].save()
+
+    def finish(self, tree):
+        """
+        Wait for the executor to run all the jobs submitted.
+        """
+
+        tree['EXECUTOR'].join()
+        if tree['PROGRESS']: tree['PROGRESS'].close()
+        if tree['LAST_LINKS']: tree['SOLUTIONS'].link()
+
+    def compile(self, tree):
+        """
+        Return the plan of the jobs, built from the parameter space rather than by browsing: the jobs of each Execute browser reached are formatted by its compiler (see Execute.compiler) from the keys bound on the way, and none of the browsers is called, so nothing is executed nor plotted. A browser binding keys in its method browse instead of its method bindings is thus not seen by the plan.
+        """
+
+        tree = tree.copy()
+        tree['EXECUTE'] = tree['PLOT'] = False
+
+        plan = plans.Plan()
+        compilers = {}
+
+        for browser, cell, bound in spaces.Space(self, tree).reach(browsers.Execute):
+            if browser not in compilers:
+                compilers[browser] = browser.compiler(tree)
+
+            plan.add(*compilers[browser](cell, bound))
 
-        self.browseAll(tree)
+        return plan
@@ -0,0 +1,60 @@
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+#
+# Authors:
+# Caner Candan <caner@candan.fr>, http://caner.candan.fr
+#
+
+"""
+Cache of the values computed by the stats, in a SQLite database (WORKDIR/stats.db). When STATS_CACHE is set in variables.py, as by default, the values of a stat for a cell are kept along with the fingerprint of the files they were computed from: their names, sizes and modification times. Plotting again, a cell whose files are unchanged gets its values back without reading any of them, so only the cells of the runs added since are computed again.
+"""
+
+import sqlite3, hashlib, json, os
+import common
+
+def fingerprint(filenames):
+    """
+    Return the digest of the names, sizes and modification times of some files, the missing ones counting by their name only.
+    """
+
+    h = hashlib.sha1()
+
+    for filename in filenames:
+        try:
+            st = os.stat(common.resolve(filename))
+            h.update(('%s %d %d\n' % (filename, st.st_size, st.st_mtime_ns)).encode())
+        except FileNotFoundError:
+            h.update(('%s\n' % filename).encode())
+
+    return h.hexdigest()
+
+class Cache:
+    def __init__(self, filename):
+        self.db = sqlite3.connect(filename, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS stats (key TEXT PRIMARY KEY, inputs TEXT, stat_values TEXT)')
+
+    def get(self, key, inputs):
+        """
+        Return the values kept under 'key' when they were computed from the files of fingerprint 'inputs', None otherwise.
+        """
+
+        row = self.db.execute('SELECT inputs, stat_values FROM stats WHERE key=?', (key,)).fetchone()
+
+        if row and row[0] == inputs:
+            return json.loads(row[1])
+
+    def put(self, key, inputs, values):
+        self.db.execute('INSERT OR REPLACE INTO stats (key, inputs, stat_values) VALUES (?, ?, ?)', (key, inputs, json.dumps(values)))
@@ -16,20 +16,234 @@
 # Caner Candan <caner@candan.fr>, http://caner.candan.fr
 #
 
-import logging
+import logging, os, io, re, gzip, shutil, subprocess, shlex, functools, string
 
-from collections import UserDict
-class AutoFillingDict(UserDict):
+# the compressors of the results, by name: the suffix of their files and their command line
+COMPRESSORS = {
+    'zstd': ('.zst', ['zstd', '-q', '-c']),
+    'gzip': ('.gz', ['gzip', '-c']),
+    }
+
+def compressor(value):
+    """
+    Return the name of the compressor asked for by the key COMPRESS of the tree: a name of COMPRESSORS, or True for zstd when its command is available and gzip otherwise.
+    """
+
+    if value is True:
+        return 'zstd' if shutil.which('zstd') else 'gzip'
+
+    if value and value not in COMPRESSORS:
+        raise ValueError('unknown compressor %s' % value)
+
+    return value or ''
+
+# the characters of the arguments needing no quoting, as shlex.quote sees them
+SAFE = (string.ascii_letters + string.digits + '_@%+=:,./-').encode()
+
+def join(argv):
+    """
+    Return the command line of a list of arguments, quoted as shlex.join does. Most of the time no argument needs quoting, which is found at once over the whole line: once its safe characters are deleted, only the spaces joining the arguments are left.
+    """
+
+    line = ' '.join(argv)
+
+    try:
+        if '' not in argv and line.encode('ascii').translate(None, SAFE) == b' ' * (len(argv) - 1):
+            return line
+    except UnicodeEncodeError:
+        pass
+
+    return shlex.join(argv)
+
+@functools.lru_cache(maxsize=1 << 10)
+def split(text):
+    """
+    Return the arguments of a command line as a tuple, split as shlex.split does.
+    """
+
+    return tuple(shlex.split(text))
+
+def zstdopen(filename, mode='rt'):
+    try:
+        from compression import zstd
+        return zstd.open(filename, mode)
+    except ImportError:
+        pass
+
+    try:
+        import zstandard
+        return zstandard.open(filename, mode)
+    except ImportError:
+        pass
+
+    data = subprocess.run(['zstd', '-q', '-d', '-c', filename], stdout=subprocess.PIPE, check=True).stdout
+    return io.StringIO(data.decode()) if 't' in mode else io.BytesIO(data)
+
+def resolve(filename):
+    """
+    Return the name of a file which may have been compressed while it was written. When the file does not exist as is, its compressed versions are looked for, with the suffixes of COMPRESSORS.
+    """
+
+    if not os.path.exists(filename):
+        for suffix, _ in COMPRESSORS.values():
+            if os.path.exists(filename + suffix):
+                return filename + suffix
+
+    return filename
+
+def opener(filename, mode='rt'):
+    """
+    Open for reading a file which may have been compressed while it was written (see resolve).
+    """
+
+    filename = resolve(filename)
+
+    if filename.endswith('.zst'): return zstdopen(filename, mode)
+    if filename.endswith('.gz'): return gzip.open(filename, mode)
+
+    return open(filename, mode)
+
+class Template:
+    """
+    A pattern of the tree, like '%(RESDIR)s/%(NAME)s_%(MANGLENAME)s.out.%(NUM)s', parsed once. It knows the keys it depends on, and formatting it only looks these keys up. A key missing from the tree raises a KeyError instead of giving an empty string.
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.keys = tuple(sorted(set(re.findall(r'%\((\w+)\)', pattern))))
+
+        # the key of a pattern only made of a reference, like '%(TIMEOUT_ARGV)s'
+        reference = re.fullmatch(r'%\((\w+)\)s', pattern)
+        self.reference = reference.group(1) if reference else None
+
+    def __call__(self, tree):
+        return substitute(self.pattern, Strict(tree) if type(tree) is AutoFillingDict else tree)
+
+templates = {}
+
+def template(pattern):
+    """
+    Return the pattern compiled, compiling it only the first time.
+    """
+
+    try:
+        return templates[pattern]
+    except KeyError:
+        templates[pattern] = Template(pattern)
+        return templates[pattern]
+
+def substitute(pattern, tree):
+    """
+    Format a pattern with a tree raising a KeyError for a missing key, a plain dictionary or a Strict view.
+    """
+
+    try:
+        return pattern % tree
+    except KeyError as e:
+        raise KeyError('the key %s is missing from the tree to format %r' % (e.args[0], pattern)) from None
+
+def expand(tree, key):
+    """
+    Format the pattern stored in the tree under 'key' with the tree itself, that is what '%(KEY)s' % tree % tree used to do.
     """
-    Another kind of dictionnary inheriting from UserDict and returning an empty string whether a key is not found.
+
+    tree = Strict(tree) if type(tree) is AutoFillingDict else tree
+
+    try:
+        pattern = tree[key]
+    except KeyError:
+        raise KeyError('the pattern %s is missing from the tree' % key) from None
+
+    return substitute(pattern, tree)
+
+from collections.abc import MutableMapping
+class AutoFillingDict(MutableMapping):
+    """
+    Another kind of dictionnary returning an empty string whether a key is not found.
     Thanks to David Mertz.
+
+    The tree is a chain of scopes: a copy is a new empty scope on top of the copied one, so copying costs nothing whatever the size of the tree, a key set goes into the top scope only and a key is looked up from the top scope down to the root. A copy is not isolated from the changes made to its parents afterwards, but the browsers never change their tree while their children are running, so it behaves as a real copy.
+    """
+
+    __slots__ = ('local', 'parent')
+
+    def __init__(self, data={}, parent=None):
+        self.local = dict(data)
+        self.parent = parent
+
+    def lookup(self, key):
+        """
+        Return the value of a key, raising a KeyError when it is missing.
+        """
+
+        scope = self
+        while scope is not None:
+            if key in scope.local: return scope.local[key]
+            scope = scope.parent
+
+        raise KeyError(key)
+
+    def __getitem__(self, key):
+        scope = self
+        while scope is not None:
+            if key in scope.local: return scope.local[key]
+            scope = scope.parent
+
+        return ''
+
+    def __setitem__(self, key, value):
+        self.local[key] = value
+
+    def __delitem__(self, key):
+        del self.local[key]
+
+    def __contains__(self, key):
+        scope = self
+        while scope is not None:
+            if key in scope.local: return True
+            scope = scope.parent
+
+        return False
+
+    def __iter__(self):
+        keys = set()
+        scope = self
+        while scope is not None:
+            keys.update(scope.local)
+            scope = scope.parent
+
+        return iter(keys)
+
+    def __len__(self):
+        return sum(1 for key in self)
+
+    def get(self, key, default=None):
+        try:
+            return self.lookup(key)
+        except KeyError:
+            return default
+
+    def copy(self):
+        # an empty scope adds nothing to the chain, its parent is enough
+        return AutoFillingDict(parent=self if self.local or self.parent is None else self.parent)
+
+class Strict:
+    """
+    A view of a tree raising a KeyError for a missing key rather than giving an empty string, so a pattern formatted with it fails on a key left out.
     """
 
-    def __init__(self, dict={}):
-        UserDict.__init__(self, dict)
+    __slots__ = ('tree',)
+
+    def __init__(self, tree):
+        self.tree = tree
 
     def __getitem__(self, key):
-        return self.data.get(key, '')
+        scope = self.tree
+        while scope is not None:
+            if key in scope.local: return scope.local[key]
+            scope = scope.parent
+
+        raise KeyError(key)
 
 class Base:
     """
@@ -4,6 +4,7 @@
 """,
 
     'SAMPLES': [],
+    'CONSTRAINTS': [],
     'NRUNS': 21,
     'POPSIZES': [20],
     'CORESIZES': [],
@@ -12,6 +13,33 @@
     'RESTART': False,
     'DYNAMIC': False,
     'EXECUTE': False,
+    'MAX_PARALLEL_JOBS': 1,
+    'PIN_CORES': False,
+    'ADMISSION': False,
+    'MEMORY_MARGIN': 262144,
+    'RESUME': False,
+    'JOURNAL': False,
+    'PROGRESS': True,
     'PLOT': True,
     'PLOT_ON_WINDOW': True,
+
+    'COMMAND_ARGV_PATTERN': [
+        '%(TIMEOUT_ARGV)s',
+        '%(MAKEXPDIR)s/%(COMMAND)s',
+        '--seed=%(SEED)d',
+        '--domain=%(DOMAIN)s',
+        '--instance=%(INSTANCE)s',
+        '--plan-file=%(PLAN_FILENAME)s',
+        '--runs-max=%(RUNMAX)d',
+        '--popSize=%(POPSIZE)d',
+        '--gen-min=%(GENMIN)d',
+        '--gen-steady=%(GENSTEADY)d',
+        '--gen-max=%(GENMAX)d',
+        '--parallelize-loop=%(PARALLELIZE)d',
+        '--parallelize-nthreads=%(CORESIZE)d',
+        '--parallelize-dynamic=%(SCHEMABOOL)d',
+        '--parallelize-enable-results=1',
+        '--parallelize-prefix=%(RES_FILENAME)s',
+        '--status=%(RES_FILENAME)s.status',
+        ],
 }
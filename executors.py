@@ -0,0 +1,841 @@
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+#
+# Authors:
+# Caner Candan <caner@candan.fr>, http://caner.candan.fr
+#
+
+"""
+Executor classes run the jobs formatted by the Execute browser. A job is a plain dictionary holding the keys of the tree needed to launch a run (PROCESS_COMMAND, RES_FILENAME, TIME_FILENAME...). The executor to use is stored in the tree under the key EXECUTOR by the Do browser.
+
+A job given with PROCESS_ARGV is started without any shell: its standard output and error are redirected to the files STDOUT and STDERR opened here, and ENV is added to the environment. Otherwise PROCESS_COMMAND is given to /bin/sh. When the job names a compressor in COMPRESS, its standard output goes through that compressor while it is written.
+
+A worker of the Coordinator executor can also be started by hand, from any directory seeing the same files:
+
+python3 executors.py HOST:PORT [SIZE [GRACE]]
+
+The tasks of the Grid Engine array jobs run their job with:
+
+python3 executors.py run JOBS TASK
+"""
+
+import logging, os, sys, signal, subprocess, threading, asyncio, time, queue, multiprocessing, tempfile, shutil, errno, json, shlex, socket, functools
+from multiprocessing.managers import BaseManager
+import common, records
+
+def cpus(filename='/sys/devices/system/cpu/online'):
+    """
+    Return the sorted list of the online cpus this process is allowed to run on. The file contains a list of ranges like '0-3,8-11'.
+    """
+
+    online = set()
+    for field in open(filename).read().strip().split(','):
+        first, _, last = field.partition('-')
+        online.update(range(int(first), int(last or first)+1))
+
+    return sorted(online & os.sched_getaffinity(0))
+
+def compress(job):
+    """
+    Start the compressor writing the standard output of a job into STDOUT, None when the output of the job is not compressed.
+    """
+
+    if not (job['PROCESS_ARGV'] and job['STDOUT'] and job['COMPRESS']): return None
+
+    with open(job['STDOUT'], 'wb') as f:
+        return subprocess.Popen(common.COMPRESSORS[job['COMPRESS']][1], stdin=subprocess.PIPE, stdout=f, start_new_session=True)
+
+def process(job, compressor=None):
+    """
+    Return the arguments and the keyword arguments used to create the process of a job. The files opened for its redirections have to be closed by the caller once the process is created.
+    """
+
+    if not job['PROCESS_ARGV']:
+        return ['/bin/sh', '-c', job['PROCESS_COMMAND']], {}
+
+    kwargs = {}
+    if compressor: kwargs['stdout'] = compressor.stdin
+    elif job['STDOUT']: kwargs['stdout'] = open(job['STDOUT'], 'wb')
+    if job['STDERR']: kwargs['stderr'] = open(job['STDERR'], 'wb')
+    if job['ENV']: kwargs['env'] = dict(os.environ, **job['ENV'])
+
+    return job['PROCESS_ARGV'], kwargs
+
+def writes_time(job):
+    """
+    Tell whether the executor has to write the time record of the job, that is when its command does not write the time file itself.
+    """
+
+    return job['TIME_FILENAME'] and job['TIME_FILENAME'] not in job['PROCESS_COMMAND']
+
+def close(kwargs):
+    for key in ['stdout', 'stderr']:
+        if key in kwargs: kwargs[key].close()
+
+def run(job):
+    """
+    Run a job in the foreground and return its exit code.
+    """
+
+    # the wall time includes the creation of the process, as its resource usage does
+    start = time.monotonic()
+
+    compressor = compress(job)
+    args, kwargs = process(job, compressor)
+    try:
+        p = subprocess.Popen(args, **kwargs)
+    finally:
+        close(kwargs)
+
+    _, status, rusage = os.wait4(p.pid, 0)
+    p.returncode = status = os.waitstatus_to_exitcode(status)
+
+    if compressor: compressor.wait()
+
+    if writes_time(job):
+        records.write(job['TIME_FILENAME'], records.record(status, rusage, time.monotonic() - start))
+
+    return status
+
+class Executor:
+    """
+    Base class for executor classes
+    """
+
+    # whether the executor enforces the RUN_TIMEOUT of the jobs itself
+    timeouts = False
+
+    def __init__(self, journal=None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.journal = journal
+
+    def submit(self, job):
+        raise NotImplementedError
+
+    def join(self):
+        """
+        Wait for all the submitted jobs to be finished.
+        """
+
+        pass
+
+class Pool(Executor):
+    """
+    Keep up to 'size' jobs running at once. The submit method only blocks when all the slots are busy.
+
+    The runs are supervised by a single asyncio event loop living in its own thread, whatever the number of runs in flight: the loop watches a pidfd for each child and reaps it with os.wait4 in order to get the resources it used. Each run is started in its own process group, so when the job carries a RUN_TIMEOUT the whole group receives SIGTERM at the deadline, then SIGKILL if it is still alive 'grace' seconds later.
+
+    When an admission control is given, a job also waits for the load and the memory of the node to allow it, see the Admission class. When a scratch is given, each run writes its files into its own scratch directory and they are moved into the working directory once it is finished, see the Scratch class.
+    """
+
+    timeouts = True
+
+    def __init__(self, size=1, grace=10, journal=None, admission=None, scratch=None):
+        Executor.__init__(self, journal)
+
+        self.size = max(size, 1)
+        self.grace = grace
+        self.admission = admission
+        self.scratch = scratch
+        self.running = 0
+        self.jobs = []
+        self.condition = threading.Condition()
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def submit(self, job):
+        job = dict(job)
+
+        with self.condition:
+            while not self.admit(job):
+                # the load and the memory of the node change without any notification
+                self.condition.wait(self.admission.interval if self.admission else None)
+
+            self.running += 1
+            self.jobs.append(job)
+            self.reserve(job)
+
+        asyncio.run_coroutine_threadsafe(self.supervise(job), self.loop)
+
+    def wait(self):
+        """
+        Wait for a slot to be free, so a job taken from a shared queue right after can start at once rather than wait here while another worker is idle.
+        """
+
+        with self.condition:
+            while self.running >= self.size:
+                self.condition.wait()
+
+    def admit(self, job):
+        """
+        Tell whether the job can be started right now.
+        """
+
+        if self.admission and self.jobs and not self.admission.fits(job, self.jobs):
+            return False
+
+        return self.running < self.size
+
+    def reserve(self, job):
+        """
+        Called once the job is admitted in order to take its resources.
+        """
+
+        pass
+
+    def release(self, job):
+        """
+        Called once the job is finished in order to give back its resources.
+        """
+
+        pass
+
+    def command(self, job, args):
+        """
+        Return the arguments used to create the process of the job, given the ones of its command.
+        """
+
+        return args
+
+    def finished(self, job, status):
+        """
+        Called once the files of the job are in the working directory.
+        """
+
+        if self.journal: self.journal.finished(job, status)
+
+        if self.admission:
+            with self.condition:
+                self.admission.learn(job)
+
+    def spawn(self, job, local):
+        """
+        Start the process of the job, along with its compressor, and return both.
+        """
+
+        compressor = compress(local)
+        args, kwargs = process(local, compressor)
+        try:
+            p = subprocess.Popen(self.command(job, args), start_new_session=True, **kwargs)
+        finally:
+            close(kwargs)
+
+        return compressor, p
+
+    async def supervise(self, job):
+        status = None
+        local = None
+
+        # the blocking calls, the journal, the files and the creation of the processes, are made out of the loop so they never hold back the timeouts and the ends of the other jobs
+        blocking = functools.partial(self.loop.run_in_executor, None)
+
+        try:
+            if self.journal: await blocking(self.journal.started, job)
+
+            # the job as it is run, with its files in its scratch directory
+            local = await blocking(self.scratch.prepare, job) if self.scratch else job
+
+            # the wall time includes the creation of the process, as its resource usage does
+            start = time.monotonic()
+            compressor, p = await blocking(self.spawn, job, local)
+
+            job['PID'] = p.pid
+
+            try:
+                status, rusage = await asyncio.wait_for(self.wait4(p.pid), job['RUN_TIMEOUT'] or None)
+            except asyncio.TimeoutError:
+                self.logger.info('%s reached its timeout of %ds' % (job['RES_FILENAME'], job['RUN_TIMEOUT']))
+                job['TIMEDOUT'] = True
+                status, rusage = await self.kill(p.pid)
+
+            # Popen must not try to reap the process again
+            p.returncode = status
+
+            if compressor:
+                # the compressor ends once it has read all the output, even of a killed run
+                compressor.returncode, _ = await self.wait4(compressor.pid)
+
+            if writes_time(local):
+                await blocking(records.write, local['TIME_FILENAME'], records.record(status, rusage, time.monotonic() - start, bool(job.get('TIMEDOUT'))))
+
+            if status:
+                self.logger.warning('%s exited with status %d' % (job['RES_FILENAME'], status))
+
+        except Exception:
+            self.logger.exception('%s could not be run' % job['RES_FILENAME'])
+
+        finally:
+            if self.scratch and local:
+                self.scratch.commit(local, lambda: self.finished(job, status))
+            else:
+                await blocking(self.finished, job, status)
+
+            with self.condition:
+                self.running -= 1
+                self.jobs.remove(job)
+                self.release(job)
+                self.condition.notify_all()
+
+    async def wait4(self, pid):
+        """
+        Wait for the end of a child without blocking the loop, then reap it and return its exit code and its resource usage.
+        """
+
+        if hasattr(os, 'pidfd_open'):
+            fd = os.pidfd_open(pid)
+            ended = self.loop.create_future()
+            self.loop.add_reader(fd, lambda: ended.done() or ended.set_result(None))
+
+            try:
+                await ended
+            finally:
+                self.loop.remove_reader(fd)
+                os.close(fd)
+
+            _, status, rusage = os.wait4(pid, 0)
+        else:
+            _, status, rusage = await self.loop.run_in_executor(None, os.wait4, pid, 0)
+
+        return os.waitstatus_to_exitcode(status), rusage
+
+    async def kill(self, pid):
+        for sig in [signal.SIGTERM, signal.SIGKILL]:
+            try:
+                os.killpg(pid, sig)
+            except ProcessLookupError:
+                pass
+
+            try:
+                return await asyncio.wait_for(self.wait4(pid), self.grace)
+            except asyncio.TimeoutError:
+                pass
+
+        return await self.wait4(pid)
+
+    def join(self):
+        with self.condition:
+            while self.running:
+                self.condition.wait()
+
+        if self.scratch: self.scratch.join()
+
+class Cores(Pool):
+    """
+    A pool considering CORESIZE as a reservation of cores. The runs are packed onto disjoint sets of cores and each child is pinned to its own set with taskset, so two runs never share a core. Without a size, there are as many slots as cores, the reservations alone bounding the runs. The set chosen is written next to the time file with the suffix '.cores'.
+    """
+
+    def __init__(self, cpus, size=None, grace=10, journal=None, admission=None, scratch=None):
+        if not shutil.which('taskset'):
+            raise RuntimeError('the runs cannot be pinned to their cores without the command taskset (util-linux)')
+
+        Pool.__init__(self, size if size else len(cpus), grace, journal, admission, scratch)
+
+        self.cpus = cpus
+        self.free = list(cpus)
+
+    def cores(self, job):
+        return max(job['CORESIZE'], 1)
+
+    def admit(self, job):
+        if self.cores(job) > len(self.cpus):
+            raise ValueError('%s asks for %d cores but only %d are available' % (job['RES_FILENAME'], self.cores(job), len(self.cpus)))
+
+        return Pool.admit(self, job) and self.cores(job) <= len(self.free)
+
+    def reserve(self, job):
+        n = self.cores(job)
+        job['CORES'] = self.free[:n]
+        del self.free[:n]
+
+        open('%(TIME_FILENAME)s.cores' % job, 'w').write('%s\n' % ','.join(str(cpu) for cpu in job['CORES']))
+
+    def command(self, job, args):
+        # pinned by taskset rather than in a preexec_fn, which is not safe in a process running threads; a new list, the PROCESS_ARGV of the jobs being possibly shared
+        return ['taskset', '-c', ','.join(str(cpu) for cpu in job['CORES'])] + list(args)
+
+    def release(self, job):
+        self.free = sorted(self.free + job['CORES'])
+
+class Admission:
+    """
+    Admission control of the runs of a pool, so that concurrent runs never make the node swap nor fight for its cores. A job is admitted only when the cores it asks for are free, counting both the cores reserved by the running jobs and the tasks runnable right now on the node according to /proc/loadavg, and when its expected peak RSS, plus what the running jobs are still expected to take, fits in MemAvailable minus a margin.
+
+    The expected peak RSS of a job is the highest one measured by the time records of the earlier runs of its cell (CELL, that is COMMAND, POPSIZE and CORESIZE by default), or by the record of its own previous attempt. As long as a cell has never been measured, a single of its runs is started at once. The first job of the pool is always admitted, otherwise a job too big for the node would wait forever.
+    """
+
+    def __init__(self, cpus, margin=0, interval=1):
+        self.cpus = cpus
+        self.margin = margin
+        self.interval = interval
+        self.peaks = {}
+        self.pagesize = os.sysconf('SC_PAGE_SIZE') // 1024
+
+    def runnable(self, filename='/proc/loadavg'):
+        """
+        Return the number of tasks runnable on the node, this one aside. The fourth field of the file is 'runnable/total'.
+        """
+
+        return int(open(filename).read().split()[3].split('/')[0]) - 1
+
+    def available(self, filename='/proc/meminfo'):
+        """
+        Return the memory available on the node in kbytes.
+        """
+
+        for line in open(filename):
+            if line.startswith('MemAvailable:'):
+                return int(line.split()[1])
+
+        return 0
+
+    def rss(self, pid):
+        """
+        Return the current RSS of a process in kbytes, 0 when it is gone.
+        """
+
+        try:
+            return int(open('/proc/%d/statm' % pid).read().split()[1]) * self.pagesize
+        except (OSError, IndexError, ValueError):
+            return 0
+
+    def expected(self, job):
+        if job['CELL'] not in self.peaks:
+            self.learn(job)
+
+        return self.peaks.get(job['CELL'])
+
+    def learn(self, job):
+        """
+        Take into account the peak RSS in the time record of a job.
+        """
+
+        record = records.read(job['TIME_FILENAME'])
+
+        if record and record.get('maxrss'):
+            self.peaks[job['CELL']] = max(self.peaks.get(job['CELL'], 0), record['maxrss'])
+
+    def fits(self, job, running):
+        expected = self.expected(job)
+
+        if expected is None:
+            if any(other['CELL'] == job['CELL'] for other in running): return False
+            expected = 0
+
+        cores = sum(max(other['CORESIZE'], 1) for other in running)
+        if max(self.runnable(), cores) + max(job['CORESIZE'], 1) > self.cpus: return False
+
+        pending = sum(max(self.peaks.get(other['CELL'], 0) - self.rss(other['PID']), 0) for other in running if 'PID' in other)
+
+        return expected + pending + self.margin <= self.available()
+
+def scratchroot(value):
+    """
+    Return the directory where the scratch directories are created, as asked for by the key SCRATCH of the tree: a directory, or True for /dev/shm when it exists and the temporary directory ($TMPDIR) otherwise.
+    """
+
+    if value is True:
+        return '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
+    return value
+
+class Scratch:
+    """
+    Private scratch directories for the runs of a pool. Before a run, a directory is created under 'root' and every path of the job lying in one of the directories 'dirs' (RESDIR and TIMEDIR) is moved into it, in the command as well. Once the run is finished its files are moved back into 'dirs' by a thread of their own.
+
+    The runs finished meanwhile are committed together every 'interval' seconds: all their files are first brought next to their targets under a hidden name, then renamed, the status files last. So the measured times do not suffer from the latency of the shared storage, and neither a partial file nor a result without its time file ever shows up in the working directory. A job is recorded as finished in the journal only once its files are committed.
+    """
+
+    def __init__(self, root, dirs, interval=1):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.root = root
+        self.dirs = [dirname.rstrip('/') for dirname in dirs]
+        self.interval = interval
+        self.pending = queue.Queue()
+        self.wake = threading.Event()
+
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def prepare(self, job):
+        """
+        Create the scratch directory of a job and return the job to run, its paths moved into that directory.
+        """
+
+        path = tempfile.mkdtemp(prefix='makexp_', dir=self.root)
+        local = dict(job, SCRATCHDIR=path)
+
+        def move(value):
+            for i, dirname in enumerate(self.dirs):
+                value = value.replace(dirname + '/', '%s/%d/' % (path, i))
+            return value
+
+        for i in range(len(self.dirs)):
+            os.mkdir('%s/%d' % (path, i))
+
+        for key in ['RES_FILENAME', 'TIME_FILENAME', 'PLAN_FILENAME', 'PROCESS_COMMAND', 'STDOUT', 'STDERR']:
+            if local[key]: local[key] = move(local[key])
+
+        if local['PROCESS_ARGV']:
+            local['PROCESS_ARGV'] = [move(arg) for arg in local['PROCESS_ARGV']]
+
+        return local
+
+    def commit(self, local, callback):
+        """
+        Queue the files of a finished job, the callback is called once they are committed.
+        """
+
+        self.pending.put((local, callback))
+
+    def run(self):
+        while True:
+            batch = [self.pending.get()]
+
+            # a join does not wait for the end of the interval
+            self.wake.wait(self.interval)
+            self.wake.clear()
+
+            while not self.pending.empty():
+                batch.append(self.pending.get())
+
+            try:
+                self.flush(batch)
+            except Exception:
+                self.logger.exception('the files of %d runs could not be committed' % len(batch))
+
+            for local, callback in batch:
+                try:
+                    callback()
+                except Exception:
+                    self.logger.exception('%s could not be recorded' % local['RES_FILENAME'])
+
+                self.pending.task_done()
+
+    def flush(self, batch):
+        moves = []
+
+        for local, _ in batch:
+            for i, dirname in enumerate(self.dirs):
+                for entry in os.scandir('%s/%d' % (local['SCRATCHDIR'], i)):
+                    moves.append((entry.path, dirname, entry.name))
+
+        # the status files tell that a run is completed, they come last
+        moves.sort(key=lambda move: move[2].endswith('.status'))
+
+        staged = []
+        for path, dirname, name in moves:
+            hidden = '%s/.%s.%d' % (dirname, name, os.getpid())
+            try:
+                os.rename(path, hidden)
+            except OSError as e:
+                if e.errno != errno.EXDEV: raise
+                shutil.copy2(path, hidden)
+            staged.append((hidden, '%s/%s' % (dirname, name)))
+
+        for hidden, target in staged:
+            os.replace(hidden, target)
+
+        for local, _ in batch:
+            shutil.rmtree(local['SCRATCHDIR'], ignore_errors=True)
+
+    def join(self):
+        """
+        Wait for all the finished jobs to be committed.
+        """
+
+        self.wake.set()
+        self.pending.join()
+
+class GridEngine(Executor):
+    """
+    Send the jobs to the cluster with the qsub command of Grid Engine. The runs of a same cell (NAME and MANGLENAME) are gathered into a single array job submitted with '-t 1-N' and the slots are asked to the parallel environment 'pe' according to CORESIZE.
+
+    Each task runs its job through 'python3 executors.py run', the jobs of the array being saved as JSON next to its script, so the time record of the run is written on the node just like the Pool does.
+
+    A cell is submitted as soon as the next one begins, each array having its own script and JSON file, numbered, so a cell coming back later never replaces the files of an array still queued. The join method submits the last cell, then polls qstat every 'interval' seconds until all the array jobs are gone from the queue; the exit status of each run is then read from its time record and recorded in the journal. The qsub and qstat commands can be replaced, by the local stand-in of sge.py for instance.
+    """
+
+    def __init__(self, scriptdir, qsub='qsub', qstat='qstat', pe='smp', interval=30, journal=None):
+        Executor.__init__(self, journal)
+
+        self.scriptdir = scriptdir
+        self.qsub = qsub
+        self.qstat = qstat
+        self.pe = pe
+        self.interval = interval
+
+        self.pending = []
+        self.submitted = {}
+
+        # the number of arrays submitted, which names their files: a cell coming back later is another array, whose files must not replace the ones of the arrays still queued
+        self.count = 0
+
+        os.makedirs(scriptdir, exist_ok=True)
+
+    def submit(self, job):
+        if self.pending and (self.pending[0]['NAME'], self.pending[0]['MANGLENAME']) != (job['NAME'], job['MANGLENAME']):
+            self.flush()
+
+        self.pending.append(job)
+
+    def flush(self):
+        if not self.pending: return
+
+        jobs, self.pending = self.pending, []
+        first = jobs[0]
+        self.count += 1
+
+        script = '%s/%s_%s.%d.sh' % (self.scriptdir, first['NAME'], first['MANGLENAME'], self.count)
+        jobsfile = '%s/%s_%s.%d.json' % (self.scriptdir, first['NAME'], first['MANGLENAME'], self.count)
+
+        open(jobsfile, 'w').write(json.dumps(jobs))
+        open(script, 'w').write('#!/bin/sh\nexec python3 %s run %s "$SGE_TASK_ID"\n' % (shlex.quote(os.path.abspath(__file__)), shlex.quote(os.path.abspath(jobsfile))))
+
+        # the tasks start in the home directory otherwise, where the relative names of the files mean nothing
+        args = shlex.split(self.qsub) + ['-terse', '-S', '/bin/sh', '-N', 'makexp', '-wd', os.getcwd(), '-o', self.scriptdir, '-e', self.scriptdir, '-t', '1-%d' % len(jobs)]
+        if first['CORESIZE'] > 1: args += ['-pe', self.pe, str(first['CORESIZE'])]
+        args.append(script)
+
+        jobid = subprocess.check_output(args, universal_newlines=True).strip().split('.')[0]
+        self.logger.debug('%s submitted as %s' % (script, jobid))
+
+        self.submitted[jobid] = jobs
+
+        if self.journal:
+            for job in jobs: self.journal.started(job)
+
+    def poll(self):
+        """
+        Return the identifiers of the jobs still in the queue.
+        """
+
+        lines = subprocess.check_output(shlex.split(self.qstat), universal_newlines=True).splitlines()
+        return set(line.split()[0] for line in lines[2:] if line.split())
+
+    def join(self):
+        self.flush()
+
+        while self.submitted:
+            queued = self.poll()
+
+            for jobid in [jobid for jobid in self.submitted if jobid not in queued]:
+                for job in self.submitted.pop(jobid):
+                    record = records.read(job['TIME_FILENAME'])
+                    status = record.get('status') if record else None
+
+                    if status:
+                        self.logger.warning('%s exited with status %d' % (job['RES_FILENAME'], status))
+
+                    if self.journal:
+                        self.journal.finished(job, status)
+
+            if self.submitted: time.sleep(self.interval)
+
+# the seconds between two signs of life of a worker
+HEARTBEAT = 10
+
+class Report:
+    """
+    Stand for the journal of the pool of a worker, the changes of state of the jobs are sent back to the coordinator along with the name of the worker.
+    """
+
+    def __init__(self, results, worker):
+        self.results = results
+        self.worker = worker
+
+    def started(self, job):
+        self.results.put(('started', job, None, self.worker))
+
+    def finished(self, job, status):
+        self.results.put(('finished', job, status, self.worker))
+
+    def alive(self):
+        """
+        Tell the coordinator that the worker is still there, every HEARTBEAT seconds, until the coordinator goes away.
+        """
+
+        try:
+            while True:
+                self.results.put(('alive', None, None, self.worker))
+                time.sleep(HEARTBEAT)
+        except (EOFError, ConnectionError):
+            pass
+
+def work(address, authkey, size=1, grace=10):
+    """
+    Pull the jobs served by a coordinator and run them, 'size' at a time, until the coordinator goes away. A job is only taken once a slot is free to run it.
+    """
+
+    class Manager(BaseManager): pass
+    Manager.register('coordinator')
+    Manager.register('results')
+
+    manager = Manager(address, authkey)
+    manager.connect()
+    coordinator, results = manager.coordinator(), manager.results()
+
+    report = Report(results, '%s:%d' % (socket.gethostname(), os.getpid()))
+    pool = Pool(size, grace, journal=report)
+
+    threading.Thread(target=report.alive, daemon=True).start()
+
+    try:
+        while True:
+            pool.wait()
+            pool.submit(coordinator.take(report.worker))
+    except (EOFError, ConnectionError):
+        pass
+
+class Coordinator(Executor):
+    """
+    Serve the jobs from a queue over a local socket, with multiprocessing.managers. Any number of workers pull the jobs, run them and send back their changes of state, so the long runs do not hold back the others. Some workers are started with the coordinator, spawned as new interpreters, so the script using it must only run under "if __name__ == '__main__'"; others can join later with the address logged at start up.
+
+    The coordinator knows the jobs held by each worker. When a worker is gone, that is its process ended or it gave no sign of life for 'silence' seconds, its jobs are queued again for the other workers, and a worker started with the coordinator is replaced, so join does not wait for jobs nobody runs any longer.
+    """
+
+    timeouts = True
+
+    # the seconds without any sign of life after which a worker is taken for gone
+    silence = 6 * HEARTBEAT
+
+    def __init__(self, workers=1, address=('127.0.0.1', 0), authkey=b'makexp', grace=10, journal=None):
+        Executor.__init__(self, journal)
+
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.running = 0
+        self.condition = threading.Condition()
+
+        # the jobs held by each worker by result file, and the last time each worker was heard of
+        self.held = {}
+        self.seen = {}
+
+        class Manager(BaseManager): pass
+        Manager.register('coordinator', callable=lambda: self, exposed=['take'])
+        Manager.register('results', callable=lambda: self.results)
+
+        self.server = Manager(address, authkey).get_server()
+        self.address = self.server.address
+        self.authkey = authkey
+        self.grace = grace
+
+        # the workers started here, by name
+        self.workers = {}
+        for i in range(workers): self.start()
+
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        threading.Thread(target=self.collect, daemon=True).start()
+        threading.Thread(target=self.watch, daemon=True).start()
+
+        self.logger.info('more workers can join with: python3 executors.py %s:%d' % self.address)
+
+    def start(self):
+        # spawned rather than forked, the coordinator running threads whose locks a fork could copy held
+        worker = multiprocessing.get_context('spawn').Process(target=work, args=(self.address, self.authkey, 1, self.grace), daemon=True)
+        worker.start()
+
+        self.workers['%s:%d' % (socket.gethostname(), worker.pid)] = worker
+
+    def submit(self, job):
+        with self.condition:
+            self.running += 1
+
+        self.jobs.put(dict(job))
+
+    def take(self, worker):
+        """
+        Give the next job to a worker, waiting for one to be submitted, and remember that the worker holds it.
+        """
+
+        job = self.jobs.get()
+
+        with self.condition:
+            self.held.setdefault(worker, {})[job['RES_FILENAME']] = job
+            self.seen[worker] = time.time()
+
+        return job
+
+    def collect(self):
+        while True:
+            state, job, status, worker = self.results.get()
+
+            with self.condition:
+                self.seen[worker] = time.time()
+
+                # a job queued again once its worker was taken for gone is finished by the worker running it now
+                if state == 'finished' and self.held.get(worker, {}).pop(job['RES_FILENAME'], None) is None: continue
+
+            if state == 'alive': continue
+
+            if self.journal:
+                getattr(self.journal, state)(*([job] if state == 'started' else [job, status]))
+
+            if state == 'finished':
+                with self.condition:
+                    self.running -= 1
+                    self.condition.notify_all()
+
+    def gone(self, worker):
+        """
+        Tell whether a worker is gone: the process of a worker started here ended, another worker gave no sign of life for a while.
+        """
+
+        if worker in self.workers:
+            return not self.workers[worker].is_alive()
+
+        return time.time() - self.seen.get(worker, 0) > self.silence
+
+    def watch(self):
+        while True:
+            time.sleep(HEARTBEAT)
+
+            with self.condition:
+                for worker, held in self.held.items():
+                    if not held or not self.gone(worker): continue
+
+                    self.logger.warning('the worker %s is gone, its %d jobs are queued again' % (worker, len(held)))
+
+                    for job in held.values():
+                        self.jobs.put(job)
+
+                    held.clear()
+
+                for worker in [worker for worker in self.workers if self.gone(worker)]:
+                    del self.workers[worker]
+                    self.start()
+
+    def join(self):
+        with self.condition:
+            while self.running:
+                self.condition.wait()
+
+def main():
+    if sys.argv[1] == 'run':
+        # a task of a Grid Engine array job
+        jobs = json.load(open(sys.argv[2]))
+        status = run(jobs[int(sys.argv[3])-1])
+        sys.exit(status if status >= 0 else 128 - status)
+
+    host, port = sys.argv[1].split(':')
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    grace = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+
+    logging.basicConfig(level=logging.INFO, format='%(name)-12s: %(levelname)-8s %(message)s')
+    work((host, int(port)), os.environ.get('MAKEXP_AUTHKEY', 'makexp').encode(), size, grace)
+
+# when executed, just run main():
+if __name__ == '__main__':
+    main()
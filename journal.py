@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+#
+# Authors:
+# Caner Candan <caner@candan.fr>, http://caner.candan.fr
+#
+
+"""
+The journal records every job of a working directory in a SQLite database (WORKDIR/journal.db) written in WAL mode, so it survives a crash and can be read while the experiences are running.
+
+Each job goes through the states queued, running, then done or failed. The Execute browser queues the jobs, the executor marks them running and finished, and the resume logic and the stats query the journal instead of listing the directories.
+
+To watch a campaign, run: python3 journal.py WORKDIR
+
+To take a snapshot of the mean durations of its cells, for --shard-durations, run: python3 journal.py --durations WORKDIR
+"""
+
+import sqlite3, threading, socket, time, json, sys, os
+
+def succeeded(job, status):
+    """
+    A job succeeds when it exits successfully, or when it is stopped by its timeout with restarts.
+    """
+
+    return status == 0 or bool(job['RESTART'] and (job.get('TIMEDOUT') or status == 124))
+
+class Journal:
+    def __init__(self, filename):
+        self.lock = threading.Lock()
+        self.host = socket.gethostname()
+
+        self.db = sqlite3.connect(filename, isolation_level=None, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                res_filename TEXT PRIMARY KEY,
+                name TEXT, manglename TEXT, num INTEGER,
+                command TEXT, params TEXT,
+                state TEXT, queued REAL, started REAL, ended REAL,
+                status INTEGER, host TEXT, cores TEXT
+                );
+            CREATE INDEX IF NOT EXISTS jobs_cell ON jobs (name, manglename, num);
+            CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state);
+            ''')
+
+    def execute(self, sql, args=()):
+        with self.lock:
+            return self.db.execute(sql, args).fetchall()
+
+    def queued(self, job, params={}):
+        """
+        Record a job about to be given to the executor, with all the scalar parameters of the tree.
+        """
+
+        self.execute('INSERT OR REPLACE INTO jobs (res_filename, name, manglename, num, command, params, state, queued) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                     (job['RES_FILENAME'], job['NAME'], job['MANGLENAME'], job['NUM'], job['PROCESS_COMMAND'], json.dumps(params, sort_keys=True), 'queued', time.time()))
+
+    def started(self, job):
+        cores = ','.join(str(cpu) for cpu in job.get('CORES', []))
+        self.execute('UPDATE jobs SET state=?, started=?, host=?, cores=? WHERE res_filename=?',
+                     ('running', time.time(), self.host, cores, job['RES_FILENAME']))
+
+    def finished(self, job, status):
+        self.execute('UPDATE jobs SET state=?, ended=?, status=? WHERE res_filename=?',
+                     ('done' if succeeded(job, status) else 'failed', time.time(), status, job['RES_FILENAME']))
+
+    def states(self):
+        """
+        Return a dictionary giving the state of each job, indexed by its result filename.
+        """
+
+        return dict(self.execute('SELECT res_filename, state FROM jobs'))
+
+    def cell(self, name, manglename):
+        """
+        Return a dictionary giving the state of each run of a cell, indexed by its number.
+        """
+
+        return dict(self.execute('SELECT num, state FROM jobs WHERE name=? AND manglename=?', (name, manglename)))
+
+    def durations(self):
+        """
+        Return the mean duration of the runs done in each cell, indexed by (NAME, MANGLENAME).
+        """
+
+        return dict(((name, manglename), duration) for name, manglename, duration in
+                    self.execute('SELECT name, manglename, AVG(ended - started) FROM jobs WHERE state=? GROUP BY name, manglename', ('done',)))
+
+    def merge(self, filename, workdir, target):
+        """
+        Copy the jobs of another journal, their filenames and the paths of their commands moved from its working directory to the target one.
+        """
+
+        columns = 'name, manglename, num, params, state, queued, started, ended, status, host, cores'
+        moved = (workdir.rstrip('/') + '/', target.rstrip('/') + '/')
+        with self.lock:
+            self.db.execute('ATTACH DATABASE ? AS other', (filename,))
+            self.db.execute('INSERT OR REPLACE INTO jobs (res_filename, command, %s) SELECT REPLACE(res_filename, ?, ?), REPLACE(command, ?, ?), %s FROM other.jobs' % (columns, columns),
+                            moved + moved)
+            self.db.execute('DETACH DATABASE other')
+
+    def summary(self):
+        return self.execute('SELECT state, COUNT(*) FROM jobs GROUP BY state ORDER BY state')
+
+def main():
+    if sys.argv[1] == '--durations':
+        durations = Journal(os.path.join(sys.argv[2], 'journal.db')).durations()
+        print(json.dumps(sorted([name, manglename, duration] for (name, manglename), duration in durations.items())))
+        return
+
+    for workdir in sys.argv[1:]:
+        filename = os.path.join(workdir, 'journal.db')
+        if not os.path.isfile(filename): continue
+
+        print(workdir)
+        for state, count in Journal(filename).summary():
+            print('\t%-8s %d' % (state, count))
+
+# when executed, just run main():
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+#
+# Authors:
+# Caner Candan <caner@candan.fr>, http://caner.candan.fr
+#
+
+"""
+Parse layer of the stats. The result and time files of a run are read once into a record holding all the metrics known, and every stat takes its value from that record instead of reading the files again. The files parsed are kept by name, along with their inode, size and modification time, so a file is only read again when it changes.
+
+The values are found by their label rather than by the index of their line: a value is the number following the first line starting with its label, like 'Elapsed time: 1.5s' or '; Makespan 42', its unit aside. All the labels wanted from a file are matched at once by a single regular expression, compiled once, while the file is streamed line by line, and the scan stops as soon as they are all found. The lines added or moved by the solver are thus harmless, and the keys like GLOBAL_TIME_IDX are no longer needed.
+"""
+
+import os, re
+import common, records
+
+# the metrics of the result files: the attribute of the record and the label of its line
+FIELDS = [
+    ('evaluation_time', 'Evaluation elapsed time'),
+    ('variation_time', 'Variation elapsed time'),
+    ('replace_time', 'Replace elapsed time'),
+    ('global_time', 'Elapsed time'),
+    ]
+
+ATTRIBUTES = dict((label, attribute) for attribute, label in FIELDS)
+
+# the labels of the fitnesses written into the plan files
+PLAN_LABELS = ['Makespan', 'TotalCost']
+
+NUMBER = r'([-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)'
+
+class Fields:
+    """
+    Some labels looked for in a file, all matched by the same regular expression. The longer labels are tried first, so a label being the beginning of another one does not hide it.
+    """
+
+    def __init__(self, labels, convert=float):
+        self.labels = list(labels)
+        self.convert = convert
+
+        alternatives = '|'.join(re.escape(label) for label in sorted(self.labels, key=len, reverse=True))
+        self.regex = re.compile(r'^\W*(%s)\W+%s' % (alternatives, NUMBER))
+
+    def extract(self, lines):
+        """
+        Return the dictionary of the values found by label, the lines being read only until all the labels are found.
+        """
+
+        values = {}
+        match = self.regex.match
+
+        for line in lines:
+            m = match(line)
+            if m is None or m.group(1) in values: continue
+
+            values[m.group(1)] = self.convert(m.group(2))
+            if len(values) == len(self.labels): break
+
+        return values
+
+RESULT = Fields(label for _, label in FIELDS)
+PLAN = Fields(PLAN_LABELS, convert=lambda value: int(float(value)))
+
+class Metrics:
+    """
+    The metrics of a run: the times found in its result file, None for the ones missing, and 'record', the time record written by the executor (see records), None when there is none.
+    """
+
+    __slots__ = [attribute for attribute, _ in FIELDS] + ['record']
+
+    def __init__(self, values, record):
+        for attribute, label in FIELDS:
+            setattr(self, attribute, values.get(label))
+
+        self.record = record
+
+    def field(self, label):
+        """
+        Return the metric of the label given, as found in the result file.
+        """
+
+        return getattr(self, ATTRIBUTES[label])
+
+def extract(fields):
+    """
+    Return a function parsing a file for the fields given.
+    """
+
+    def parse(filename):
+        with common.opener(filename) as f:
+            return fields.extract(f)
+
+    return parse
+
+class Cache:
+    """
+    The files parsed by a function, kept by name. An entry is valid as long as the inode, size and modification time of the file stay the same. A missing file gives None.
+    """
+
+    # beyond this number of files kept, the cache is emptied
+    size = 1 << 16
+
+    def __init__(self, parse):
+        self.parse = parse
+        self.entries = {}
+
+    def __call__(self, filename):
+        try:
+            st = os.stat(common.resolve(filename))
+        except FileNotFoundError:
+            return None
+
+        fingerprint = (st.st_ino, st.st_size, st.st_mtime_ns)
+
+        entry = self.entries.get(filename)
+        if entry and entry[0] == fingerprint: return entry[1]
+
+        if len(self.entries) >= self.size: self.entries.clear()
+
+        value = self.parse(filename)
+        self.entries[filename] = (fingerprint, value)
+
+        return value
+
+results = Cache(extract(RESULT))
+plans = Cache(extract(PLAN))
+times = Cache(records.read)
+
+def read(tree, res='RES_FILENAME', time='TIME_FILENAME'):
+    """
+    Return the metrics of the run whose result and time files are named by the keys 'res' and 'time' of the tree. Either key may be None when the file is not needed.
+    """
+
+    values = results(tree[res]) if res and tree[res] else None
+    record = times(tree[time]) if time and tree[time] else None
+
+    return Metrics(values or {}, record)
+
+def fitness(filename, label):
+    """
+    Return the fitness of the label given, like 'Makespan', found in a plan file, None when it is missing.
+    """
+
+    values = plans(filename)
+    return values.get(label) if values else None
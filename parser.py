@@ -37,6 +37,8 @@ options = parser()
 parser = p.Parser()
 parser.add_option('-f', '--filename', help='give a filename')
 options = parser()
+
+The command line is parsed and the logging configured only once, at the first call: the next calls return the same options, so calling the parser from every browser, stat and tracer costs nothing. Adding an option afterwards makes the next call parse the command line again.
 """
 
 import optparse, logging, sys
@@ -45,6 +47,8 @@ class Parser(optparse.OptionParser):
     def __init__(self):
         optparse.OptionParser.__init__(self, usage="Usage: %prog [options] [WORKDIR] [OTHER_WORKDIR]")
 
+        self.options = None
+
         self.levels = {'debug': logging.DEBUG,
                        'info': logging.INFO,
                        'warning': logging.WARNING,
@@ -82,7 +86,13 @@ class Parser(optparse.OptionParser):
             print("\t", keys)
         sys.exit()
 
+    def add_option(self, *args, **kwargs):
+        self.options = None
+        return optparse.OptionParser.add_option(self, *args, **kwargs)
+
     def __call__(self):
+        if self.options is not None: return self.options
+
         options, args = self.parse_args()
         nargs = len(args)
         if options.levels: self._list_verbose_levels()
@@ -90,4 +100,6 @@ class Parser(optparse.OptionParser):
         if nargs:
             options.workdir = args[0]
             if nargs > 1: options.other_workdir = args[1]
+
+        self.options = options
         return options
@@ -0,0 +1,118 @@
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+#
+# Authors:
+# Caner Candan <caner@candan.fr>, http://caner.candan.fr
+#
+
+"""
+A plan is the flat list of the jobs described by the browser tree. It is compiled by the Do browser from the parameter space, without calling the browsers: the jobs of each Execute browser reached are formatted from the keys bound on the way, with its patterns compiled once for all the runs.
+
+Use the option --plan to print the plan as JSON lines instead of running the experiences.
+
+The plan is also used to share a campaign between several nodes: with the option --shard I/N, each node only runs the I-th of N shards. The jobs are spread so that the shards have about the same estimated cost, rather than the same number of jobs. Every node has to compute the same partition, so the costs only come from the plan itself or from a snapshot of durations given explicitly with --shard-durations, the same file for all the nodes; such a snapshot is written by 'python3 journal.py --durations WORKDIR'. Once the shards are finished, the option --merge gathers their working directories into a single one for the stats and the tracers.
+"""
+
+import json, os
+
+class Job(dict):
+    """
+    A job of the plan, that is a dictionary which cannot be modified.
+    """
+
+    def __setitem__(self, key, value):
+        raise TypeError('a job of the plan cannot be modified')
+
+    def __delitem__(self, key):
+        raise TypeError('a job of the plan cannot be modified')
+
+    def update(self, *args, **kwargs):
+        raise TypeError('a job of the plan cannot be modified')
+
+class Plan:
+    def __init__(self, jobs=[]):
+        self.jobs = list(jobs)
+
+    def add(self, job, params={}):
+        """
+        Add a job with the parameters of the run.
+        """
+
+        self.jobs.append(Job(job, PARAMS=params))
+
+    def __iter__(self):
+        return iter(self.jobs)
+
+    def write(self, f):
+        for job in self.jobs:
+            f.write('%s\n' % json.dumps(job, sort_keys=True))
+
+    @staticmethod
+    def read(f):
+        return Plan(Job(json.loads(line)) for line in f if line.strip())
+
+def costs(plan, durations={}):
+    """
+    Return the estimated cost of each job. The cost of a run is POPSIZE x GENMAX / CORESIZE, scaled to seconds with the mean durations of the cells already done when some are known.
+    """
+
+    def estimate(job):
+        return float(job['PARAMS'].get('POPSIZE', 1) * job['PARAMS'].get('GENMAX', 1)) / max(job['CORESIZE'], 1)
+
+    known = [(durations[(job['NAME'], job['MANGLENAME'])], estimate(job)) for job in plan if (job['NAME'], job['MANGLENAME']) in durations]
+    scale = sum(duration for duration, _ in known) / sum(cost for _, cost in known) if known else 1
+
+    return [durations.get((job['NAME'], job['MANGLENAME']), estimate(job) * scale) for job in plan]
+
+def durations(f):
+    """
+    Read a snapshot of durations, as written by 'python3 journal.py --durations': a JSON list of [NAME, MANGLENAME, seconds].
+    """
+
+    return dict(((name, manglename), duration) for name, manglename, duration in json.load(f))
+
+def shard(plan, index, count, durations={}):
+    """
+    Return the result filenames of the jobs of the shard 'index' (from 1 to 'count'). The jobs are taken by decreasing cost and each one goes to the shard having the lowest total cost so far, so every node computes the same partition.
+    """
+
+    if not 1 <= index <= count:
+        raise ValueError('the shard %d/%d does not exist' % (index, count))
+
+    loads = [0.] * count
+    shards = [set() for i in range(count)]
+
+    for cost, job in sorted(zip(costs(plan, durations), plan), key=lambda x: (-x[0], x[1]['RES_FILENAME'])):
+        i = loads.index(min(loads))
+        loads[i] += cost
+        shards[i].add(job['RES_FILENAME'])
+
+    return shards[index-1]
+
+def merge(workdirs, tree):
+    """
+    Gather the result and time files of the working directories of several shards into the working directory of the tree, with symbolic links, and merge their journals into its journal.
+    """
+
+    for workdir in workdirs:
+        for dirname, target in [('Res', tree['RESDIR']), ('Time', tree['TIMEDIR'])]:
+            os.makedirs(target, exist_ok=True)
+
+            for entry in os.scandir(os.path.join(workdir, dirname)):
+                link = os.path.join(target, entry.name)
+                if not os.path.lexists(link):
+                    os.symlink(os.path.abspath(entry.path), link)
+
+        if tree['JOURNAL'] and os.path.isfile(os.path.join(workdir, 'journal.db')):
+            tree['JOURNAL'].merge(os.path.join(workdir, 'journal.db'), workdir, tree['WORKDIR'])
@@ -0,0 +1,103 @@
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+#
+# Authors:
+# Caner Candan <caner@candan.fr>, http://caner.candan.fr
+#
+
+"""
+Progress of a campaign. When PROGRESS is set in variables.py, the Do browser compiles the plan of the jobs to run, the ones already completed or belonging to another shard aside, and gives each one its estimated cost (see plans.costs). The executor then reports the jobs started and finished to the progress instead of the journal, which it forwards them to.
+
+Every PROGRESS_INTERVAL seconds, the progress is logged and written as JSON into WORKDIR/progress.json: the number of jobs done, failed and running, the throughput in runs per hour, and the estimated time left. The time left is the cost left divided by the cost done per second so far, so it takes both the parallelism and the real speed of the node into account.
+"""
+
+import logging, threading, json, time, os
+import journal
+
+class Progress:
+    def __init__(self, costs, filename, interval=30, journal=None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.costs = costs
+        self.filename = filename
+        self.interval = interval
+        self.journal = journal
+
+        self.total = len(costs)
+        self.total_cost = sum(costs.values())
+        self.done = self.failed = 0
+        self.done_cost = 0.
+        self.running = set()
+        self.begin = time.time()
+
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def started(self, job):
+        with self.lock:
+            self.running.add(job['RES_FILENAME'])
+
+        if self.journal: self.journal.started(job)
+
+    def finished(self, job, status):
+        with self.lock:
+            self.running.discard(job['RES_FILENAME'])
+            self.done += 1
+            self.done_cost += self.costs.get(job['RES_FILENAME'], 0)
+            if not journal.succeeded(job, status): self.failed += 1
+
+        if self.journal: self.journal.finished(job, status)
+
+    def status(self):
+        with self.lock:
+            elapsed = time.time() - self.begin
+            eta = (self.total_cost - self.done_cost) * elapsed / self.done_cost if self.done_cost else None
+
+            return {
+                'total': self.total,
+                'done': self.done,
+                'failed': self.failed,
+                'running': len(self.running),
+                'percent': 100. * self.done_cost / self.total_cost if self.total_cost else 100.,
+                'runs_per_hour': self.done * 3600. / elapsed if elapsed else 0.,
+                'elapsed': elapsed,
+                'eta': eta,
+                'eta_date': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(time.time() + eta)) if eta is not None else None,
+                'updated': time.strftime('%Y-%m-%d %H:%M:%S'),
+                }
+
+    def report(self):
+        status = self.status()
+
+        self.logger.info('%(done)d/%(total)d done (%(percent).1f%%), %(failed)d failed, %(running)d running, %(runs_per_hour).1f runs/hour, ETA %(eta_date)s' % status)
+
+        open('%s.%d' % (self.filename, os.getpid()), 'w').write('%s\n' % json.dumps(status, sort_keys=True))
+        os.replace('%s.%d' % (self.filename, os.getpid()), self.filename)
+
+    def run(self):
+        while not self.stop.wait(self.interval):
+            try:
+                self.report()
+            except Exception:
+                self.logger.exception('the progress could not be reported')
+
+    def close(self):
+        """
+        Stop the periodic reports and write the last one.
+        """
+
+        self.stop.set()
+        self.thread.join()
+        self.report()
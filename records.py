@@ -0,0 +1,96 @@
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+#
+# Authors:
+# Caner Candan <caner@candan.fr>, http://caner.candan.fr
+#
+
+"""
+Time records of the runs. When the command does not write its time file itself, the executor collects the resources used by the run with os.wait4 and writes them into the time file as a JSON record. The time files written by '/usr/bin/time -v' are still read, in looking for the labels of their lines.
+
+A record is a dictionary with the keys: wall, utime, stime (seconds), percent_cpu, maxrss (kbytes), minflt, majflt, nvcsw, nivcsw, status and timedout.
+"""
+
+import json
+
+def record(status, rusage, wall, timedout=False):
+    cpu = rusage.ru_utime + rusage.ru_stime
+
+    return {
+        'wall': wall,
+        'utime': rusage.ru_utime,
+        'stime': rusage.ru_stime,
+        'percent_cpu': round(cpu / wall * 100) if wall else 0,
+        'maxrss': rusage.ru_maxrss,
+        'minflt': rusage.ru_minflt,
+        'majflt': rusage.ru_majflt,
+        'nvcsw': rusage.ru_nvcsw,
+        'nivcsw': rusage.ru_nivcsw,
+        'status': status,
+        'timedout': timedout,
+        }
+
+def write(filename, record):
+    open(filename, 'w').write('%s\n' % json.dumps(record, sort_keys=True))
+
+def clock(value):
+    """
+    Convert a wall clock time written as h:mm:ss or m:ss into seconds.
+    """
+
+    seconds = 0.
+    for field in value.split(':'):
+        seconds = seconds * 60 + float(field)
+
+    return seconds
+
+# the labels of the lines written by '/usr/bin/time -v'
+LABELS = {
+    'Elapsed (wall clock) time (h:mm:ss or m:ss)': ('wall', clock),
+    'User time (seconds)': ('utime', float),
+    'System time (seconds)': ('stime', float),
+    'Percent of CPU this job got': ('percent_cpu', lambda value: float(value.rstrip('%'))),
+    'Maximum resident set size (kbytes)': ('maxrss', int),
+    'Minor (reclaiming a frame) page faults': ('minflt', int),
+    'Major (requiring I/O) page faults': ('majflt', int),
+    'Voluntary context switches': ('nvcsw', int),
+    'Involuntary context switches': ('nivcsw', int),
+    'Exit status': ('status', int),
+    }
+
+def read(filename):
+    """
+    Return the record of a time file, None when the file is missing or empty.
+    """
+
+    try:
+        data = open(filename).read()
+    except FileNotFoundError:
+        return None
+
+    if not data.strip(): return None
+    if data.startswith('{'): return json.loads(data)
+
+    record = {'timedout': False}
+
+    for line in data.splitlines():
+        label, _, value = line.strip().rpartition(': ')
+        if label in LABELS:
+            key, convert = LABELS[label]
+            try:
+                record[key] = convert(value)
+            except ValueError:
+                pass
+
+    return record
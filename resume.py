@@ -0,0 +1,66 @@
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+#
+# Authors:
+# Caner Candan <caner@candan.fr>, http://caner.candan.fr
+#
+
+"""
+Resume an interrupted campaign. When RESUME is set in variables.py, the Execute browser skips the runs already completed in the working directory, only the missing or failed ones are executed again.
+"""
+
+import os
+import common, records
+
+class Completed:
+    """
+    Tell whether a job is already completed. A run is completed when its status file exists, its result file is not empty and its time record holds a successful exit status. With restarts, a run stopped by its timeout (status 124) is completed as well.
+
+    The result and time directories are listed only once, with os.scandir, so the jobs whose files are missing are answered without any system call. When a journal is given, the jobs it knows are answered from their recorded state and the files are only checked for the others.
+    """
+
+    def __init__(self, resdir, timedir, journal=None):
+        self.res = self.listdir(resdir)
+        self.time = self.listdir(timedir)
+        self.states = journal.states() if journal else {}
+
+    def listdir(self, dirname):
+        try:
+            return dict((entry.name, entry) for entry in os.scandir(dirname))
+        except FileNotFoundError:
+            return {}
+
+    def result(self, name):
+        """
+        Return the entry of a result file, maybe compressed.
+        """
+
+        for suffix in [''] + [suffix for suffix, _ in common.COMPRESSORS.values()]:
+            if name + suffix in self.res: return self.res[name + suffix]
+
+    def __contains__(self, job):
+        if job['RES_FILENAME'] in self.states:
+            return self.states[job['RES_FILENAME']] == 'done'
+
+        res = self.result(os.path.basename(job['RES_FILENAME']))
+        status = self.res.get(os.path.basename('%(RES_FILENAME)s.status' % job))
+        time = self.time.get(os.path.basename(job['TIME_FILENAME']))
+
+        if not (res and status and time): return False
+        if not res.stat().st_size: return False
+
+        record = records.read(time.path)
+        if not record or 'status' not in record: return False
+
+        return record['status'] == 0 or (job['RESTART'] and (record['status'] == 124 or record['timedout']))
@@ -0,0 +1,84 @@
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+#
+# Authors:
+# Caner Candan <caner@candan.fr>, http://caner.candan.fr
+#
+
+"""
+Local stand-in for the qsub and qstat commands of Grid Engine, in order to try the GridEngine executor on a single node. Set in variables.py:
+
+'GRID_ENGINE': True,
+'QSUB': 'python3 /path/to/sge.py qsub',
+'QSTAT': 'python3 /path/to/sge.py qstat',
+
+Like Grid Engine, the tasks of an array job start in the home directory unless the option -wd is given, their standard output and error go into the directories given by -o and -e, and the job stays listed by qstat until all its tasks are finished. The tasks of a job run one after the other, in the background. The jobs queued are kept as files in the directory MAKEXP_SGE (a temporary directory by default).
+"""
+
+import sys, os, subprocess, random, tempfile, shlex
+
+QUEUE = os.environ.get('MAKEXP_SGE', os.path.join(tempfile.gettempdir(), 'makexp-sge'))
+
+def qsub(args):
+    options = {}
+    flags = {'-terse'}
+
+    while len(args) > 1:
+        if args[0] in flags:
+            args = args[1:]
+        elif args[0] == '-pe':
+            options['-pe'] = args[1:3]
+            args = args[3:]
+        else:
+            options[args[0]] = args[1]
+            args = args[2:]
+
+    script = os.path.abspath(args[0])
+    first, _, last = options.get('-t', '1-1').partition('-')
+    jobid = '%d' % random.randint(100000, 999999)
+    name = options.get('-N', os.path.basename(script))
+
+    os.makedirs(QUEUE, exist_ok=True)
+    open(os.path.join(QUEUE, jobid), 'w').write('%s\n' % name)
+
+    tasks = []
+    for task in range(int(first), int(last or first)+1):
+        out = os.path.join(os.path.abspath(options.get('-o', os.environ['HOME'])), '%s.o%s.%d' % (name, jobid, task))
+        err = os.path.join(os.path.abspath(options.get('-e', os.environ['HOME'])), '%s.e%s.%d' % (name, jobid, task))
+        tasks.append('SGE_TASK_ID=%d %s %s > %s 2> %s' % (task, shlex.quote(options.get('-S', '/bin/sh')), shlex.quote(script), shlex.quote(out), shlex.quote(err)))
+
+    command = 'cd %s; %s; rm -f %s' % (shlex.quote(options.get('-wd', os.environ['HOME'])), '; '.join(tasks), shlex.quote(os.path.join(QUEUE, jobid)))
+    subprocess.Popen(['/bin/sh', '-c', command], start_new_session=True, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    print('%s.%s-%s:1' % (jobid, first, last or first) if '-t' in options else jobid)
+
+def qstat(args):
+    print('job-ID  prior   name')
+    print('-' * 40)
+
+    if not os.path.isdir(QUEUE): return
+
+    for jobid in sorted(os.listdir(QUEUE)):
+        print('%s 0.50000 %s' % (jobid, open(os.path.join(QUEUE, jobid)).read().strip()))
+
+def main():
+    command, args = sys.argv[1], sys.argv[2:]
+
+    if command == 'qsub': qsub(args)
+    elif command == 'qstat': qstat(args)
+    else: sys.exit('usage: %s qsub|qstat ARGS' % sys.argv[0])
+
+# when executed, just run main():
+if __name__ == '__main__':
+    main()
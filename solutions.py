@@ -0,0 +1,181 @@
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+#
+# Authors:
+# Caner Candan <caner@candan.fr>, http://caner.candan.fr
+#
+
+"""
+Index of the solution files. The solver writes the solutions of a run into files named after PLANFILENAME_PATTERN followed by a suffix counting them, like 'P1_S48_C48.soln.3.2' for the second solution of the third run, and the last solution of a run may be given the suffix 'last'.
+
+The last solution of a run is the one of greatest suffix, as found by the index, so the directory is not probed suffix after suffix. When LAST_LINKS is set in variables.py, as by default, the Do browser makes after the execution the file of suffix 'last' of every run a symbolic link to its last solution, for the tools reading these files directly, instead of a copy.
+
+The directory of the results is listed with os.scandir, and its solution files are indexed by their stem (the file name up to the number of the run), the number of the run and their suffix, so the fitness stats look their files up instead of listing and matching the whole directory for every cell. It is listed once, then again only when the executor has reported runs finished since, a single listing taking in the files of all these runs whatever their numbering. The index is saved as JSON into WORKDIR/solutions.json at the end of the Do browser, along with the modification time of the directory when it was listed. When the directory has not changed since, it is not listed at all, otherwise only the files added or removed are applied to the index.
+"""
+
+import os, re, json, time
+
+# a solution file: its stem, ending with a non digit, the number of its run and its suffix
+NAME = re.compile(r'^(.*\D)(\d+)\.(\d+|last)$')
+
+class Index:
+    """
+    The solution files of a directory. It stands for the journal of the executor too: a run reported as finished has the directory listed again at the next lookup, then it is forwarded to 'journal'.
+    """
+
+    def __init__(self, dirname, filename=None, journal=None):
+        self.dirname = dirname
+        self.filename = filename
+        self.journal = journal
+
+        # the stems, then the numbers of the runs, then the suffixes of the solutions
+        self.entries = {}
+        self.names = set()
+        self.mtime = None
+        self.listed = False
+
+        self.load()
+
+    def load(self):
+        if not self.filename: return
+
+        try:
+            data = json.load(open(self.filename))
+        except (FileNotFoundError, ValueError):
+            return
+
+        if data.get('dirname') != self.dirname: return
+
+        for name in data['names']:
+            self.add(name)
+
+        self.mtime = data['mtime']
+
+    def save(self):
+        if not self.filename: return
+
+        data = {'dirname': self.dirname, 'mtime': self.mtime, 'names': sorted(self.names)}
+
+        open('%s.%d' % (self.filename, os.getpid()), 'w').write(json.dumps(data))
+        os.replace('%s.%d' % (self.filename, os.getpid()), self.filename)
+
+    def add(self, name):
+        m = NAME.match(name)
+        if not m: return
+
+        stem, num, suffix = m.groups()
+        self.entries.setdefault(stem, {}).setdefault(int(num), set()).add(suffix)
+        self.names.add(name)
+
+    def remove(self, name):
+        stem, num, suffix = NAME.match(name).groups()
+        runs = self.entries[stem]
+        runs[int(num)].discard(suffix)
+
+        if not runs[int(num)]: del runs[int(num)]
+        if not runs: del self.entries[stem]
+
+        self.names.discard(name)
+
+    def refresh(self):
+        """
+        Bring the index up to date with the directory, listing it only when it has changed since it was last listed, and only the first time or once the executor has reported runs finished since.
+        """
+
+        if self.listed: return
+        self.listed = True
+
+        try:
+            mtime = os.stat(self.dirname).st_mtime_ns
+        except FileNotFoundError:
+            return
+
+        if mtime == self.mtime: return
+
+        names = set(entry.name for entry in os.scandir(self.dirname) if NAME.match(entry.name))
+
+        for name in self.names - names: self.remove(name)
+        for name in names - self.names: self.add(name)
+
+        # a directory modified within the resolution of its time stamp may change again unnoticed, it is listed again next time
+        self.mtime = mtime if time.time_ns() - mtime > 2 * 10**9 else None
+
+    def started(self, job):
+        if self.journal: self.journal.started(job)
+
+    def finished(self, job, status):
+        """
+        Note that the directory is to be listed again when the run wrote its solutions there, then forward the run to the journal.
+        """
+
+        prefix = job.get('PLAN_FILENAME')
+
+        if prefix and os.path.normpath(os.path.dirname(prefix)) == os.path.normpath(self.dirname):
+            self.listed = False
+
+        if self.journal: self.journal.finished(job, status)
+
+    def runs(self, prefix):
+        """
+        Return the runs of a plan file name given without its number, like PLAN_FILENAME expanded with an empty NUM: a dictionary of the suffixes of the solutions by number of run.
+        """
+
+        self.refresh()
+
+        return self.entries.get(os.path.basename(prefix), {})
+
+    def solutions(self, prefix):
+        """
+        Return the names of all the solution files of the runs, by number of run and then by suffix, the last ones aside.
+        """
+
+        return ['%s%d.%s' % (prefix, num, suffix)
+                for num, suffixes in sorted(self.runs(prefix).items())
+                for suffix in sorted(int(suffix) for suffix in suffixes if suffix != 'last')]
+
+    def last(self, prefix):
+        """
+        Return the names of the last solution files of the runs, by number of run. A run whose solutions are gone but its file of suffix 'last' gives this one.
+        """
+
+        return ['%s%d.%s' % (prefix, num, lastof(suffixes)) for num, suffixes in sorted(self.runs(prefix).items())]
+
+    def link(self):
+        """
+        Make the file of suffix 'last' of every run a symbolic link to its last solution. The links already right are left as they are, the other ones and the copies are replaced.
+        """
+
+        self.refresh()
+
+        for stem, runs in self.entries.items():
+            for num, suffixes in runs.items():
+                target = '%s%d.%s' % (stem, num, lastof(suffixes))
+                name = os.path.join(self.dirname, '%s%d.last' % (stem, num))
+
+                if target.endswith('.last'): continue
+                if 'last' in suffixes and os.path.islink(name) and os.readlink(name) == target: continue
+
+                os.symlink(target, '%s.%d' % (name, os.getpid()))
+                os.replace('%s.%d' % (name, os.getpid()), name)
+
+                suffixes.add('last')
+                self.names.add(os.path.basename(name))
+
+def lastof(suffixes):
+    """
+    Return the greatest of the suffixes of a run, 'last' when it is the only one.
+    """
+
+    numbers = [int(suffix) for suffix in suffixes if suffix != 'last']
+    return str(max(numbers)) if numbers else 'last'
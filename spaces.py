@@ -0,0 +1,110 @@
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+#
+# Authors:
+# Caner Candan <caner@candan.fr>, http://caner.candan.fr
+#
+
+"""
+The parameter space browsed by a chain of browsers. Each browser binds some keys of the tree (its attribute 'keys') to the values given by its method 'bindings', and the space is the product of all of them, walked lazily.
+
+The configurations not wanted are removed with CONSTRAINTS in variables.py, a list of Python expressions over the keys of the tree and the builtins, like 'CORESIZE <= min(POPSIZE, 8)'. A constraint is checked by the browser binding the last of its keys, so the subtrees it prunes are never expanded. A constraint naming no key bound by a browser is checked once by the Do browser.
+"""
+
+class Constraint:
+    def __init__(self, expression):
+        self.expression = expression
+        self.code = compile(expression, '<constraint>', 'eval')
+        self.names = set(self.code.co_names)
+
+    def __call__(self, tree):
+        """
+        Evaluate the expression over the keys of the tree it names, the builtins like min being at hand. A name that is neither a key of the tree nor a builtin raises a NameError, rather than being taken for an empty string.
+        """
+
+        namespace = {}
+
+        for name in self.names:
+            try:
+                namespace[name] = tree.lookup(name)
+            except KeyError:
+                pass
+
+        return eval(self.code, namespace)
+
+constraints = {}
+
+def constraint(expression):
+    """
+    Return the expression compiled, compiling it only the first time.
+    """
+
+    if expression not in constraints:
+        constraints[expression] = Constraint(expression)
+
+    return constraints[expression]
+
+class Space:
+    """
+    The configurations reaching the leaves of a chain of browsers, that is the dictionaries of the keys bound along the way. The space is walked only when iterated, and len() gives its exact size, the constraints taken into account.
+    """
+
+    def __init__(self, browser, tree):
+        self.browser = browser
+        self.tree = tree
+
+    def __iter__(self):
+        return self.walk(self.browser, self.tree.copy(), ())
+
+    def walk(self, browser, tree, keys):
+        keys += browser.keys
+
+        for _ in browser.space(tree):
+            if not browser.browsers:
+                yield dict((key, tree[key]) for key in keys)
+
+            for child in browser.browsers:
+                yield from self.walk(child, tree.copy(), keys)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def reach(self, kind):
+        """
+        Return the list of the browsers of the class 'kind' reached, the browsers being never called. Each one comes with two dictionaries: the keys bound by the last browser having keys on the way, and the keys bound above it, which are the same object for all the configurations differing only by the last keys, like the runs of a cell. Unlike the leaves, they are gathered at once rather than walked lazily, so a configuration is not handed up through every level of the chain.
+        """
+
+        reached = []
+        self.bind(kind, self.browser, self.tree.copy(), {}, {}, reached)
+
+        return reached
+
+    def bind(self, kind, browser, tree, outer, inner, reached):
+        if browser.keys:
+            above = dict(outer)
+            above.update(inner)
+
+        for values in browser.space(tree) if browser.keys else [()]:
+            if browser.keys:
+                outer, inner = above, dict(zip(browser.keys, values))
+
+            if isinstance(browser, kind):
+                reached.append((browser, outer, inner))
+
+            for child in browser.browsers:
+                # a browser without keys binds nothing, a leaf of them is reached at once
+                if child.keys or child.browsers:
+                    self.bind(kind, child, tree.copy() if child.keys else tree, outer, inner, reached)
+                elif isinstance(child, kind):
+                    reached.append((child, outer, inner))
@@ -16,15 +16,101 @@
 # Caner Candan <caner@candan.fr>, http://caner.candan.fr
 #
 
-from os import listdir
-import common
+import os
+import common, metrics, cache
 
 class Stat(common.Base):
+    """
+    A stat computes a list of values for a cell, like the elapsed times of its runs, gives it to its tracer and writes it into a file. The subclasses give the values with the method 'values' and the files they are computed from with the method 'inputs', or with the attribute 'patterns' for the files read for every run.
+
+    With a cache in the tree (see cache), the values of a cell whose files are unchanged since they were computed are taken from the cache instead, and their file is only written when it is missing.
+    """
+
+    # the patterns of the files read for every run
+    patterns = []
+
+    # the pattern of the file the values are written into, GRAPHFILENAME_PATTERN by default
+    graphfile = None
+
     def __init__(self, parser, tracer=None):
         common.Base.__init__(self, parser)
 
         self.tracer = tracer
 
+    def callit(self, options, tree):
+        if not tree['PLOT']: return
+
+        tree['MANGLENAME'] = common.expand(tree, 'MANGLENAME_PATTERN')
+        self.prepare(tree)
+
+        values = None
+
+        if tree['STATS']:
+            key = self.identity(tree)
+            inputs = cache.fingerprint(self.inputs(tree))
+            values = tree['STATS'].get(key, inputs)
+
+        cached = values is not None
+
+        if not cached:
+            values = self.values(tree)
+            if tree['STATS']: tree['STATS'].put(key, inputs, values)
+
+        if len(values) > 0:
+            self.tracer.add(values)
+            tree['TITLE'] = self.title.replace(' ', '_')
+
+            filename = common.template(self.graphfile)(tree) if self.graphfile else common.expand(tree, 'GRAPHFILENAME_PATTERN')
+            if not (cached and os.path.exists(filename)):
+                open(filename, 'w').write(str(values))
+
+    def prepare(self, tree):
+        """
+        Set the keys of the tree the stat needs besides MANGLENAME.
+        """
+
+        pass
+
+    def identity(self, tree):
+        """
+        Return the key of the values of the cell in the cache: the stat, with its parameters, and the cell.
+        """
+
+        params = [getattr(self, name, '') for name in ['title', 'pattern', 'key', 'rate']]
+        return ' '.join([self.__class__.__name__] + [str(param) for param in params] + [tree['NAME'], tree['MANGLENAME']])
+
+    def inputs(self, tree):
+        """
+        Return the names of the files the values are computed from.
+        """
+
+        tree = tree.copy()
+        filenames = []
+
+        for tree['NUM'] in self.runs(tree):
+            filenames += [common.expand(tree, pattern) for pattern in self.patterns]
+
+        return filenames
+
+    def values(self, tree):
+        """
+        Return the list of the values of the cell.
+        """
+
+        return []
+
+    def runs(self, tree):
+        """
+        Return the numbers of the runs to read. With a journal knowing the cell, only the runs done are read.
+        """
+
+        if tree['JOURNAL']:
+            states = tree['JOURNAL'].cell(tree['NAME'], tree['MANGLENAME'])
+            if states:
+                return [num for num in range(1, tree['NRUNS']+1) if states.get(num) == 'done']
+
+        return range(1, tree['NRUNS']+1)
+
 class AgregatedFitness(Stat):
     def __init__(self, parser, tracer, idx_name, pattern, title="Agregated Fitness"):
         Stat.__init__(self, parser, tracer)
@@ -33,34 +119,23 @@ class AgregatedFitness(Stat):
         self.pattern = pattern
         self.title = title
 
-    def callit(self, options, tree):
-        if not tree['PLOT']: return
-
-        tree['MANGLENAME'] = '%(MANGLENAME_PATTERN)s' % tree % tree
+    def prepare(self, tree):
         tree['NUM'] = ''
-        tree['PLAN_FILENAME'] = '%(PLANFILENAME_PATTERN)s' % tree % tree
-
-        idx = tree[self.idx_name]
-        fitnesses = []
+        tree['PLAN_FILENAME'] = common.expand(tree, 'PLANFILENAME_PATTERN')
 
-        dirs = listdir(tree['RESDIR'])
-        dirs.sort()
-        for f in dirs:
-            f = '%s/%s' % (tree['RESDIR'], f)
+    def inputs(self, tree):
+        return tree['SOLUTIONS'].solutions(tree['PLAN_FILENAME'])
 
-            if tree['PLAN_FILENAME'] in f:
-                data = open(f).readlines()
+    def values(self, tree):
+        fitnesses = []
 
-                if len(data) <= idx: continue
-                if self.pattern not in data[idx]: continue
+        for f in self.inputs(tree):
+            fitness = metrics.fitness(f, self.pattern)
+            if fitness is None: continue
 
-                fitness = int(data[idx].split()[-1])
-                fitnesses.append(fitness)
+            fitnesses.append(fitness)
 
-        if len(fitnesses) > 0:
-            self.tracer.add(fitnesses)
-            tree['TITLE'] = self.title.replace(' ', '_')
-            open('%(GRAPHFILENAME_PATTERN)s' % tree % tree, 'w').write(str(fitnesses))
+        return fitnesses
 
 class AgregatedMakeSpan(AgregatedFitness):
     def __init__(self, parser, tracer):
@@ -78,34 +153,23 @@ class Fitness(Stat):
         self.pattern = pattern
         self.title = title
 
-    def callit(self, options, tree):
-        if not tree['PLOT']: return
-
-        tree['MANGLENAME'] = '%(MANGLENAME_PATTERN)s' % tree % tree
+    def prepare(self, tree):
         tree['NUM'] = ''
-        tree['PLAN_FILENAME'] = '%(PLANFILENAME_PATTERN)s' % tree % tree
-
-        fitnesses = []
-        idx = tree[self.idx_name]
+        tree['PLAN_FILENAME'] = common.expand(tree, 'PLANFILENAME_PATTERN')
 
-        dirs = listdir(tree['RESDIR'])
-        dirs.sort()
-        for tree['FILENAME'] in dirs:
-            f = '%(RESDIR)s/%(FILENAME)s' % tree
+    def inputs(self, tree):
+        return tree['SOLUTIONS'].last(tree['PLAN_FILENAME'])
 
-            if tree['PLAN_FILENAME'] in f and '.last' in f:
-                data = open(f).readlines()
+    def values(self, tree):
+        fitnesses = []
 
-                if len(data) <= idx: continue
-                if self.pattern not in data[idx]: continue
+        for f in self.inputs(tree):
+            fitness = metrics.fitness(f, self.pattern)
+            if fitness is None: continue
 
-                fitness = int(data[idx].split()[-1])
-                fitnesses.append(fitness)
+            fitnesses.append(fitness)
 
-        if len(fitnesses) > 0:
-            self.tracer.add(fitnesses)
-            tree['TITLE'] = self.title.replace(' ', '_')
-            open('%(GRAPHFILENAME_PATTERN)s' % tree % tree, 'w').write(str(fitnesses))
+        return fitnesses
 
 class MakeSpan(Fitness):
     def __init__(self, parser, tracer):
@@ -116,90 +180,63 @@ class TotalCost(Fitness):
         Fitness.__init__(self, parser, tracer, idx_name='TOTALCOST_IDX', pattern='TotalCost', title='Total cost')
 
 class SpeedUp(Stat):
-    def __init__(self, parser, tracer, idx_name, pattern):
+    patterns = ['TIMEFILENAME_PATTERN']
+
+    def __init__(self, parser, tracer, key='percent_cpu'):
         Stat.__init__(self, parser, tracer)
 
-        self.idx_name = idx_name
-        self.pattern = pattern
+        self.key = key
         self.title = 'Speedup'
 
-    def callit(self, options, tree):
-        if not tree['PLOT']: return
-
-        tree['MANGLENAME'] = '%(MANGLENAME_PATTERN)s' % tree % tree
-
+    def values(self, tree):
         diffs = []
 
-        for tree['NUM'] in range(1, tree['NRUNS']+1):
-            tree['TIME_FILENAME'] = '%(TIMEFILENAME_PATTERN)s' % tree % tree
-
-            idx = tree[self.idx_name]
-
-            data = open(tree['TIME_FILENAME']).readlines()
+        for tree['NUM'] in self.runs(tree):
+            tree['TIME_FILENAME'] = common.expand(tree, 'TIMEFILENAME_PATTERN')
 
-            if len(data) <= idx: continue
+            record = metrics.read(tree, res=None).record
+            if not record or self.key not in record: continue
 
-            if 'Command exited' in data[0]:
-                idx += 1
-                if len(data) <= idx: continue
-
-            if self.pattern not in data[idx]: continue
-
-            diff = float(data[idx].split()[-1][:-1]) / 100
+            diff = float(record[self.key]) / 100
             diffs.append(diff)
 
-        if len(diffs) > 0:
-            self.tracer.add(diffs)
-            tree['TITLE'] = self.title.replace(' ', '_')
-            open('%(GRAPHFILENAME_PATTERN)s' % tree % tree, 'w').write(str(diffs))
+        return diffs
 
 class Efficiency(Stat):
-    def __init__(self, parser, tracer, idx_name, pattern):
+    patterns = ['TIMEFILENAME_PATTERN']
+
+    def __init__(self, parser, tracer, key='percent_cpu'):
         Stat.__init__(self, parser, tracer)
 
-        self.idx_name = idx_name
-        self.pattern = pattern
+        self.key = key
         self.title = 'Efficiency'
 
-    def callit(self, options, tree):
-        if not tree['PLOT']: return
-
-        tree['MANGLENAME'] = '%(MANGLENAME_PATTERN)s' % tree % tree
-
+    def values(self, tree):
         diffs = []
 
-        for tree['NUM'] in range(1, tree['NRUNS']+1):
-            tree['TIME_FILENAME'] = '%(TIMEFILENAME_PATTERN)s' % tree % tree
-
-            idx = tree[self.idx_name]
+        for tree['NUM'] in self.runs(tree):
+            tree['TIME_FILENAME'] = common.expand(tree, 'TIMEFILENAME_PATTERN')
 
-            data = open(tree['TIME_FILENAME']).readlines()
+            record = metrics.read(tree, res=None).record
+            if not record or self.key not in record: continue
 
-            if len(data) <= idx: continue
-
-            if 'Command exited' in data[0]:
-                idx += 1
-                if len(data) <= idx: continue
-
-            if self.pattern not in data[idx]: continue
-
-            diff = float(data[idx].split()[-1][:-1]) / tree["CORESIZE"] * 1/100
+            diff = float(record[self.key]) / tree["CORESIZE"] * 1/100
             diffs.append(diff)
 
-        if len(diffs) > 0:
-            self.tracer.add(diffs)
-            tree['TITLE'] = self.title.replace(' ', '_')
-            open('%(GRAPHFILENAME_PATTERN)s' % tree % tree, 'w').write(str(diffs))
+        return diffs
 
 class TimeSpeedUp(SpeedUp):
     def __init__(self, parser, tracer):
-        SpeedUp.__init__(self, parser, tracer, idx_name='SPEEDUP_IDX', pattern='Percent of CPU this job got')
+        SpeedUp.__init__(self, parser, tracer)
 
 class TimeEfficiency(Efficiency):
     def __init__(self, parser, tracer):
-        Efficiency.__init__(self, parser, tracer, idx_name='EFFICIENCY_IDX', pattern='Percent of CPU this job got')
+        Efficiency.__init__(self, parser, tracer)
 
 class ElapsedTime(Stat):
+    patterns = ['RESFILENAME_PATTERN', 'TIMEFILENAME_PATTERN']
+    graphfile = '%(GRAPHDIR)s/%(TITLE)s_%(NAME)s_%(MANGLENAME)s.time'
+
     def __init__(self, parser, tracer, idx_name, pattern, title="Elapsed time", rate=False):
         Stat.__init__(self, parser, tracer)
 
@@ -208,60 +245,34 @@ class ElapsedTime(Stat):
         self.title = title
         self.rate = rate
 
-    def callit(self, options, tree):
-        if not tree['PLOT']: return
-
-        tree['MANGLENAME'] = '%(MANGLENAME_PATTERN)s' % tree % tree
-
-        idx = tree[self.idx_name]
+    def values(self, tree):
         times = []
 
-        for tree['NUM'] in range(1, tree['NRUNS']+1):
-            tree['RES_FILENAME'] = '%(RESFILENAME_PATTERN)s' % tree % tree
+        for tree['NUM'] in self.runs(tree):
+            tree['RES_FILENAME'] = common.expand(tree, 'RESFILENAME_PATTERN')
+            tree['TIME_FILENAME'] = common.expand(tree, 'TIMEFILENAME_PATTERN')
 
-            data = open(tree['RES_FILENAME']).readlines()
+            run = metrics.read(tree)
 
-            if len(data) <= idx: continue
-            if self.pattern not in data[idx]: continue
+            time = run.field(self.pattern)
+            if time is None: continue
 
             global_time = None
 
             if self.rate:
-                idx_global_time = tree['GLOBAL_TIME_IDX']
-                if len(data) <= idx_global_time: continue
-                if "Elapsed time" not in data[idx_global_time]:
-
-                    tree['TIME_FILENAME'] = '%(TIMEFILENAME_PATTERN)s' % tree % tree
-
-                    idx_time = tree['TIME_IDX']
-                    data_time = open(tree['TIME_FILENAME']).readlines()
-
-                    if len(data_time) <= idx_time: continue
-
-                    if 'Command exited' in data_time[0]:
-                        idx_time += 1
-                        if len(data_time) <= idx_time: continue
-
-                    if 'Elapsed (wall clock) time' not in data_time[idx_time]: continue
-
-                    global_time = data_time[idx_time].split()[-1][:-1].split(':')
-                    global_time = float(int(global_time[0]) * 60 + float(global_time[1]))
+                global_time = run.global_time
 
-                else:
+                if global_time is None:
+                    if not run.record or 'wall' not in run.record: continue
 
-                    global_time = float(data[idx_global_time].split()[-1][:-1])
-
-            time = float(data[idx].split()[-1][:-1])
+                    global_time = float(run.record['wall'])
 
             if self.rate:
                 times.append(time/global_time)
             else:
                 times.append(time)
 
-        if len(times) > 0:
-            self.tracer.add(times)
-            tree['TITLE'] = self.title.replace(' ', '_')
-            open('%(GRAPHDIR)s/%(TITLE)s_%(NAME)s_%(MANGLENAME)s.time' % tree, 'w').write(str(times))
+        return times
 
 class EvaluationTime(ElapsedTime):
     def __init__(self, parser, tracer):
@@ -276,6 +287,9 @@ class ReplaceTime(ElapsedTime):
         ElapsedTime.__init__(self, parser, tracer, 'REPLACE_TIME_IDX', 'Replace elapsed time', title='Replace elapsed rate time')
 
 class ElapsedTimeCommand(Stat):
+    patterns = ['RESFILENAME_PATTERN', 'TIMEFILENAME_PATTERN']
+    graphfile = '%(GRAPHDIR)s/%(TITLE)s_%(NAME)s_%(MANGLENAME)s.time'
+
     def __init__(self, parser, tracer, idx_name, pattern, title="Elapsed time", rate=False):
         Stat.__init__(self, parser, tracer)
 
@@ -284,58 +298,37 @@ class ElapsedTimeCommand(Stat):
         self.title = title
         self.rate = rate
 
-    def callit(self, options, tree):
+    def values(self, tree):
         """
         Construct the list 'times' in browsing N runs, then for each run, it reads there result and time files:
         - the result file provides the absolute elapsed time measured at runtime
-        - the time file provides the elapsed time (wall clock) got through the command time
+        - the time file provides the elapsed time (wall clock) recorded by the executor or got through the command time
         """
 
-        if not tree['PLOT']: return
-
-        tree['MANGLENAME'] = '%(MANGLENAME_PATTERN)s' % tree % tree
-
         times = []
 
-        for tree['NUM'] in range(1, tree['NRUNS']+1):
-            tree['RES_FILENAME'] = '%(RESFILENAME_PATTERN)s' % tree % tree
-            tree['TIME_FILENAME'] = '%(TIMEFILENAME_PATTERN)s' % tree % tree
+        for tree['NUM'] in self.runs(tree):
+            tree['RES_FILENAME'] = common.expand(tree, 'RESFILENAME_PATTERN')
+            tree['TIME_FILENAME'] = common.expand(tree, 'TIMEFILENAME_PATTERN')
 
-            idx = tree[self.idx_name]
+            run = metrics.read(tree)
 
             global_time = None
 
             if self.rate:
-                idx_time = tree['TIME_IDX']
-                data_time = open(tree['TIME_FILENAME']).readlines()
-
-                if len(data_time) <= idx_time: continue
+                if not run.record or 'wall' not in run.record: continue
 
-                if 'Command exited' in data_time[0]:
-                    idx_time += 1
-                    if len(data_time) <= idx_time: continue
+                global_time = float(run.record['wall'])
 
-                if 'Elapsed (wall clock) time' not in data_time[idx_time]: continue
-
-                global_time = data_time[idx_time].split()[-1][:-1].split(':')
-                global_time = float(int(global_time[0]) * 60 + float(global_time[1]))
-
-            data = open(tree['RES_FILENAME']).readlines()
-
-            if len(data) <= idx: continue
-            if self.pattern not in data[idx]: continue
-
-            time = float(data[idx].split()[-1][:-1])
+            time = run.field(self.pattern)
+            if time is None: continue
 
             if self.rate:
                 times.append(time/global_time)
             else:
                 times.append(time)
 
-        if len(times) > 0:
-            self.tracer.add(times)
-            tree['TITLE'] = self.title.replace(' ', '_')
-            open('%(GRAPHDIR)s/%(TITLE)s_%(NAME)s_%(MANGLENAME)s.time' % tree, 'w').write(str(times))
+        return times
 
 class GlobalTime(ElapsedTimeCommand):
     def __init__(self, parser, tracer):
@@ -346,6 +339,8 @@ class ResultsSpeedup(Stat):
     Generate some values for speedup based on the sequential execution results.
     """
 
+    patterns = ['RESFILENAME_PATTERN', 'SEQ_RESFILENAME_PATTERN']
+
     def __init__(self, parser, tracer, idx_name='GLOBAL_TIME_IDX', pattern='Elapsed time', title="Results Speedup"):
         Stat.__init__(self, parser, tracer)
 
@@ -353,44 +348,32 @@ class ResultsSpeedup(Stat):
         self.pattern = pattern
         self.title = title
 
-    def callit(self, options, tree):
-        if not tree['PLOT']: return
-
-        tree['MANGLENAME'] = '%(MANGLENAME_PATTERN)s' % tree % tree
-        tree['SEQ_MANGLENAME'] = '%(SEQ_MANGLENAME_PATTERN)s' % tree % tree
+    def prepare(self, tree):
+        tree['SEQ_MANGLENAME'] = common.expand(tree, 'SEQ_MANGLENAME_PATTERN')
 
+    def values(self, tree):
         times = []
 
-        for tree['NUM'] in range(1, tree['NRUNS']+1):
-            tree['RES_FILENAME'] = '%(RESFILENAME_PATTERN)s' % tree % tree
-            tree['SEQ_RES_FILENAME'] = '%(SEQ_RESFILENAME_PATTERN)s' % tree % tree
-
-            idx = tree[self.idx_name]
-
-            data = open(tree['RES_FILENAME']).readlines()
-            seqdata = open(tree['SEQ_RES_FILENAME']).readlines()
+        for tree['NUM'] in self.runs(tree):
+            tree['RES_FILENAME'] = common.expand(tree, 'RESFILENAME_PATTERN')
+            tree['SEQ_RES_FILENAME'] = common.expand(tree, 'SEQ_RESFILENAME_PATTERN')
 
-            if len(data) <= idx: continue
-            if self.pattern not in data[idx]: continue
+            partime = metrics.read(tree, time=None).field(self.pattern)
+            seqtime = metrics.read(tree, res='SEQ_RES_FILENAME', time=None).field(self.pattern)
 
-            if len(seqdata) <= idx: continue
-            if self.pattern not in seqdata[idx]: continue
-
-            seqtime = float(seqdata[idx].split()[-1][:-1])
-            partime = float(data[idx].split()[-1][:-1])
+            if partime is None or seqtime is None: continue
             # print seqtime, partime, seqtime / partime, tree['CORESIZE'], tree['NAME']
             times.append(seqtime / partime)
 
-        if len(times) > 0:
-            self.tracer.add(times)
-            tree['TITLE'] = self.title.replace(' ', '_')
-            open('%(GRAPHFILENAME_PATTERN)s' % tree % tree, 'w').write(str(times))
+        return times
 
 class ResultsEfficiency(Stat):
     """
     Generate some values for efficiency based on the sequential execution results.
     """
 
+    patterns = ['RESFILENAME_PATTERN', 'SEQ_RESFILENAME_PATTERN']
+
     def __init__(self, parser, tracer, idx_name='GLOBAL_TIME_IDX', pattern='Elapsed time', title="Results Efficiency"):
         Stat.__init__(self, parser, tracer)
 
@@ -398,31 +381,20 @@ class ResultsEfficiency(Stat):
         self.pattern = pattern
         self.title = title
 
-    def callit(self, options, tree):
-        if not tree['PLOT']: return
-
-        tree['MANGLENAME'] = '%(MANGLENAME_PATTERN)s' % tree % tree
-        tree['SEQ_MANGLENAME'] = '%(SEQ_MANGLENAME_PATTERN)s' % tree % tree
+    def prepare(self, tree):
+        tree['SEQ_MANGLENAME'] = common.expand(tree, 'SEQ_MANGLENAME_PATTERN')
 
+    def values(self, tree):
         times = []
 
-        for tree['NUM'] in range(1, tree['NRUNS']+1):
-            tree['RES_FILENAME'] = '%(RESFILENAME_PATTERN)s' % tree % tree
-            tree['SEQ_RES_FILENAME'] = '%(SEQ_RESFILENAME_PATTERN)s' % tree % tree
-
-            idx = tree[self.idx_name]
+        for tree['NUM'] in self.runs(tree):
+            tree['RES_FILENAME'] = common.expand(tree, 'RESFILENAME_PATTERN')
+            tree['SEQ_RES_FILENAME'] = common.expand(tree, 'SEQ_RESFILENAME_PATTERN')
 
-            data = open(tree['RES_FILENAME']).readlines()
-            seqdata = open(tree['SEQ_RES_FILENAME']).readlines()
+            partime = metrics.read(tree, time=None).field(self.pattern)
+            seqtime = metrics.read(tree, res='SEQ_RES_FILENAME', time=None).field(self.pattern)
 
-            if len(data) <= idx: continue
-            if self.pattern not in data[idx]: continue
-
-            if len(seqdata) <= idx: continue
-            if self.pattern not in seqdata[idx]: continue
-
-            seqtime = float(seqdata[idx].split()[-1][:-1])
-            partime = float(data[idx].split()[-1][:-1])
+            if partime is None or seqtime is None: continue
 
             # if ( seqtime / (partime * tree['CORESIZE']) ) > 1:
             #     print seqtime, partime, seqtime / (partime * tree['CORESIZE']), tree['CORESIZE'], tree['NAME']
@@ -431,7 +403,4 @@ class ResultsEfficiency(Stat):
 
             times.append(seqtime / (partime * tree['CORESIZE']))
 
-        if len(times) > 0:
-            self.tracer.add(times)
-            tree['TITLE'] = self.title.replace(' ', '_')
-            open('%(GRAPHFILENAME_PATTERN)s' % tree % tree, 'w').write(str(times))
+        return times
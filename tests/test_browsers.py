@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+#
+# Authors:
+# Caner Candan <caner@candan.fr>, http://caner.candan.fr
+#
+
+
+import sys, os, unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import browsers, common, spaces
+
+class TestExecute(unittest.TestCase):
+    def setUp(self):
+        self.tree = common.AutoFillingDict({
+            'NAME': 'n', 'RESDIR': 'Res', 'TIMEDIR': 'Time', 'COMMAND': 'prog', 'TIMEOUT_COMMAND': 'timeout 10',
+            'POPSIZES': [4, 8], 'NRUNS': 2,
+            'MANGLENAME_PATTERN': 'P%(POPSIZE)d',
+            'RESFILENAME_PATTERN': '%(RESDIR)s/%(NAME)s_%(MANGLENAME)s.out.%(NUM)d',
+            'TIMEFILENAME_PATTERN': '%(TIMEDIR)s/%(NAME)s_%(MANGLENAME)s.time.%(NUM)d',
+            'PLANFILENAME_PATTERN': '%(RESDIR)s/%(NAME)s_%(MANGLENAME)s.soln.%(NUM)s',
+            'CELL_PATTERN': '%(NAME)s_%(MANGLENAME)s',
+            'STDOUT_PATTERN': '%(RES_FILENAME)s', 'STDERR_PATTERN': '',
+            'COMMAND_ARGV_PATTERN': ['%(TIMEOUT_ARGV)s', '%(COMMAND)s', '--popSize=%(POPSIZE)d', '--name=%(NAME)s %(NUM)d', '%(EMPTY)s'],
+            'EMPTY': '',
+            })
+
+        self.execute = browsers.Execute(None)
+        self.pop = browsers.Pop(None, browsers.Range(None, self.execute))
+
+    def test_format(self):
+        tree = self.tree.copy()
+        tree['POPSIZE'] = 4
+        tree['NUM'] = 2
+
+        self.execute.format(tree)
+
+        self.assertEqual(tree['RES_FILENAME'], 'Res/n_P4.out.2')
+        self.assertEqual(tree['PROCESS_ARGV'], ['timeout', '10', 'prog', '--popSize=4', '--name=n 2'])
+        self.assertEqual(tree['PROCESS_COMMAND'], "timeout 10 prog --popSize=4 '--name=n 2' > Res/n_P4.out.2")
+
+    def test_compiler(self):
+        # the compiler gives the same jobs as the browser formatting the tree of each run
+        compiled = self.execute.compiler(self.tree)
+
+        for _, outer, inner in spaces.Space(self.pop, self.tree).reach(browsers.Execute):
+            tree = self.tree.copy()
+            tree.update(outer)
+            tree = tree.copy()
+            tree.update(inner)
+            self.execute.format(tree)
+
+            job, params = compiled(outer, inner)
+
+            self.assertEqual(job, self.execute.job(tree))
+            self.assertEqual(params, self.execute.params(tree))
+            self.assertEqual(params, {'COMMAND': 'prog', 'EMPTY': '', 'POPSIZE': outer['POPSIZE'], 'RESDIR': 'Res', 'TIMEDIR': 'Time',
+                                      'TIMEOUT_ARGV': ['timeout', '10']})
+
+if __name__ == '__main__':
+    unittest.main()
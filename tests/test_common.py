@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+#
+# Authors:
+# Caner Candan <caner@candan.fr>, http://caner.candan.fr
+#
+
+
+import sys, os, shlex, unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import common
+
+class TestTemplate(unittest.TestCase):
+    def test_keys(self):
+        template = common.template('%(RESDIR)s/%(NAME)s_%(MANGLENAME)s.out.%(NUM)s')
+
+        self.assertEqual(template.keys, ('MANGLENAME', 'NAME', 'NUM', 'RESDIR'))
+        self.assertIsNone(template.reference)
+        self.assertIs(common.template(template.pattern), template)
+
+    def test_reference(self):
+        self.assertEqual(common.template('%(TIMEOUT_ARGV)s').reference, 'TIMEOUT_ARGV')
+        self.assertIsNone(common.template('-t %(TIMEOUT_ARGV)s').reference)
+
+    def test_format(self):
+        template = common.template('%(A)s_%(B)d_%(C)s_%(D)s')
+        tree = common.AutoFillingDict({'A': True, 'B': 1})
+        tree = tree.copy()
+        tree['C'] = 1.0
+        tree['D'] = ''
+
+        # the values are formatted as the % operator does, whatever their type
+        self.assertEqual(template(tree), 'True_1_1.0_')
+        self.assertEqual(template({'A': True, 'B': 1, 'C': 1.0, 'D': ''}), 'True_1_1.0_')
+
+    def test_missing(self):
+        template = common.template('%(RESDIR)s/%(NAME)s')
+
+        with self.assertRaisesRegex(KeyError, 'NAME'):
+            template(common.AutoFillingDict({'RESDIR': 'Res'}))
+
+        with self.assertRaisesRegex(KeyError, 'NAME'):
+            template({'RESDIR': 'Res'})
+
+    def test_expand(self):
+        tree = common.AutoFillingDict({'RESDIR': 'Res', 'NAME': 'n', 'RESFILENAME_PATTERN': '%(RESDIR)s/%(NAME)s'})
+
+        self.assertEqual(common.expand(tree.copy(), 'RESFILENAME_PATTERN'), 'Res/n')
+
+        with self.assertRaisesRegex(KeyError, 'PLANFILENAME_PATTERN'):
+            common.expand(tree, 'PLANFILENAME_PATTERN')
+
+class TestJoin(unittest.TestCase):
+    def test_shlex(self):
+        for argv in [[], ['prog'], ['prog', '-x', '1', 'a/b.c'], ['prog', ''], ['prog', 'a b'], ['prog', "it's"],
+                     ['prog', 'a\nb'], ['prog', '$HOME', '*'], ['prog', 'é'], ['prog', '--opt=a,b:c@d+e%f']]:
+            self.assertEqual(common.join(argv), shlex.join(argv), argv)
+
+    def test_split(self):
+        self.assertEqual(common.split('timeout -s INT 10'), ('timeout', '-s', 'INT', '10'))
+        self.assertEqual(common.split(common.join(['a b', "c'd"])), ('a b', "c'd"))
+
+class TestAutoFillingDict(unittest.TestCase):
+    def test_scopes(self):
+        root = common.AutoFillingDict({'A': 1})
+        child = root.copy()
+        child['B'] = 2
+
+        self.assertEqual(child['A'], 1)
+        self.assertEqual(child['C'], '')
+        self.assertEqual(root['B'], '')
+        self.assertEqual(sorted(child), ['A', 'B'])
+
+        with self.assertRaises(KeyError):
+            child.lookup('C')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+#
+# Authors:
+# Caner Candan <caner@candan.fr>, http://caner.candan.fr
+#
+
+
+import sys, os, json, shutil, tempfile, unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import executors
+
+SGE = '%s %s' % (sys.executable, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sge.py'))
+
+class Journal:
+    def __init__(self):
+        self.runs = []
+        self.statuses = {}
+
+    def started(self, job):
+        self.runs.append(job['RES_FILENAME'])
+
+    def finished(self, job, status):
+        self.statuses[job['RES_FILENAME']] = status
+
+class TestGridEngine(unittest.TestCase):
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.environ = os.environ.get('MAKEXP_SGE')
+        os.environ['MAKEXP_SGE'] = os.path.join(self.dirname, 'queue')
+
+    def tearDown(self):
+        if self.environ is None:
+            del os.environ['MAKEXP_SGE']
+        else:
+            os.environ['MAKEXP_SGE'] = self.environ
+
+        shutil.rmtree(self.dirname)
+
+    def job(self, i, manglename):
+        res = os.path.join(self.dirname, 'res.%d' % i)
+
+        return {'NAME': 'n', 'MANGLENAME': manglename, 'NUM': i, 'CORESIZE': 1, 'RESTART': '',
+                'RES_FILENAME': res, 'TIME_FILENAME': os.path.join(self.dirname, 'time.%d' % i),
+                'PROCESS_COMMAND': 'echo %d > %s' % (i, res), 'PROCESS_ARGV': '', 'STDOUT': '', 'STDERR': '',
+                'COMPRESS': '', 'ENV': '', 'RUN_TIMEOUT': 0}
+
+    def test_batching(self):
+        journal = Journal()
+        scriptdir = os.path.join(self.dirname, 'scripts')
+        executor = executors.GridEngine(scriptdir, '%s qsub' % SGE, '%s qstat' % SGE, interval=0.1, journal=journal)
+
+        # the runs of a cell in a row go into one array, a cell coming back later into another one
+        cells = ['A', 'A', 'B', 'A', 'B', 'B']
+        for i, manglename in enumerate(cells):
+            executor.submit(self.job(i, manglename))
+
+        executor.join()
+
+        arrays = sorted(name for name in os.listdir(scriptdir) if name.endswith('.json'))
+        self.assertEqual(arrays, ['n_A.1.json', 'n_A.3.json', 'n_B.2.json', 'n_B.4.json'])
+        self.assertEqual([[job['NUM'] for job in json.load(open(os.path.join(scriptdir, name)))] for name in arrays],
+                         [[0, 1], [3], [2], [4, 5]])
+
+        # every run ran once, with the job of its own array
+        self.assertEqual(sorted(journal.runs), sorted(self.job(i, cell)['RES_FILENAME'] for i, cell in enumerate(cells)))
+        self.assertEqual(journal.statuses, dict((self.job(i, cell)['RES_FILENAME'], 0) for i, cell in enumerate(cells)))
+
+        for i in range(len(cells)):
+            self.assertEqual(open(os.path.join(self.dirname, 'res.%d' % i)).read(), '%d\n' % i)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+#
+# Authors:
+# Caner Candan <caner@candan.fr>, http://caner.candan.fr
+#
+
+
+import sys, os, json, shutil, tempfile, unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import journal
+
+def job(num, restart=''):
+    return {'RES_FILENAME': '/w/Res/n_m.out.%d' % num, 'NAME': 'n', 'MANGLENAME': 'm', 'NUM': num,
+            'PROCESS_COMMAND': 'prog > /w/Res/n_m.out.%d' % num, 'CORES': [0, 1], 'RESTART': restart}
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.journal = journal.Journal(os.path.join(self.dirname, 'journal.db'))
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def test_states(self):
+        for num in range(1, 5):
+            self.journal.queued(job(num), {'POPSIZE': 10})
+
+        self.journal.started(job(1))
+        self.journal.started(job(2))
+        self.journal.started(job(3))
+        self.journal.finished(job(2), 0)
+        self.journal.finished(job(3), 1)
+
+        self.assertEqual(self.journal.cell('n', 'm'), {1: 'running', 2: 'done', 3: 'failed', 4: 'queued'})
+        self.assertEqual(self.journal.states()['/w/Res/n_m.out.4'], 'queued')
+        self.assertEqual(dict(self.journal.summary()), {'done': 1, 'failed': 1, 'queued': 1, 'running': 1})
+
+        params, cores = self.journal.execute('SELECT params, cores FROM jobs WHERE num=1')[0]
+        self.assertEqual(json.loads(params), {'POPSIZE': 10})
+        self.assertEqual(cores, '0,1')
+
+    def test_requeued(self):
+        self.journal.queued(job(1))
+        self.journal.started(job(1))
+        self.journal.finished(job(1), 1)
+        self.journal.queued(job(1))
+
+        self.assertEqual(self.journal.cell('n', 'm'), {1: 'queued'})
+
+    def test_succeeded(self):
+        self.assertTrue(journal.succeeded(job(1), 0))
+        self.assertFalse(journal.succeeded(job(1), 124))
+        self.assertFalse(journal.succeeded(job(1), None))
+        self.assertTrue(journal.succeeded(job(1, restart='RESTART'), 124))
+        self.assertTrue(journal.succeeded(dict(job(1, restart='RESTART'), TIMEDOUT=True), -2))
+
+    def test_durations(self):
+        self.journal.queued(job(1))
+        self.journal.queued(job(2))
+        self.journal.execute('UPDATE jobs SET state=?, started=?, ended=?', ('done', 10., 13.))
+        self.journal.execute('UPDATE jobs SET ended=? WHERE num=2', (15.,))
+
+        self.assertEqual(self.journal.durations(), {('n', 'm'): 4.})
+
+    def test_merge(self):
+        other = journal.Journal(os.path.join(self.dirname, 'other.db'))
+        other.queued(job(1))
+        other.started(job(1))
+        other.finished(job(1), 0)
+
+        self.journal.merge(os.path.join(self.dirname, 'other.db'), '/w/', '/all')
+
+        self.assertEqual(self.journal.execute('SELECT res_filename, command, state FROM jobs'),
+                         [('/all/Res/n_m.out.1', 'prog > /all/Res/n_m.out.1', 'done')])
+
+if __name__ == '__main__':
+    unittest.main()
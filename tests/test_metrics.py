@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+#
+# Authors:
+# Caner Candan <caner@candan.fr>, http://caner.candan.fr
+#
+
+
+import sys, os, shutil, tempfile, unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import metrics
+
+class TestFields(unittest.TestCase):
+    def test_extract(self):
+        lines = ['Solver v1\n', 'Evaluation elapsed time: 0.5s\n', 'Elapsed time: 1.5e1s\n', 'Variation elapsed time: 2\n', 'Elapsed time: 99s\n']
+
+        self.assertEqual(metrics.RESULT.extract(lines),
+                         {'Evaluation elapsed time': 0.5, 'Elapsed time': 15., 'Variation elapsed time': 2.})
+
+    def test_prefix(self):
+        # a label being the beginning of another one does not hide it
+        fields = metrics.Fields(['Time', 'Time total'])
+        self.assertEqual(fields.extract(['Time total 3\n', 'Time 2\n']), {'Time': 2., 'Time total': 3.})
+
+    def test_stop(self):
+        def lines():
+            yield '; Makespan 42\n'
+            yield '; TotalCost 7.9\n'
+            raise AssertionError('the lines are read after all the labels are found')
+
+        self.assertEqual(metrics.PLAN.extract(lines()), {'Makespan': 42, 'TotalCost': 7})
+
+    def test_missing(self):
+        self.assertEqual(metrics.RESULT.extract(['Replace elapsed time\n', 'nothing\n']), {})
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def test_cache(self):
+        calls = []
+
+        def parse(filename):
+            calls.append(filename)
+            return open(filename).read()
+
+        cache = metrics.Cache(parse)
+        filename = os.path.join(self.dirname, 'res')
+
+        self.assertIsNone(cache(filename))
+
+        open(filename, 'w').write('a')
+        self.assertEqual(cache(filename), 'a')
+        self.assertEqual(cache(filename), 'a')
+        self.assertEqual(len(calls), 1)
+
+        # a file changed is read again
+        open(filename, 'w').write('bc')
+        self.assertEqual(cache(filename), 'bc')
+        self.assertEqual(len(calls), 2)
+
+    def test_read(self):
+        res = os.path.join(self.dirname, 'res')
+        open(res, 'w').write('Elapsed time: 2s\n')
+
+        values = metrics.read({'RES_FILENAME': res, 'TIME_FILENAME': os.path.join(self.dirname, 'time')})
+
+        self.assertEqual(values.global_time, 2.)
+        self.assertEqual(values.field('Elapsed time'), 2.)
+        self.assertIsNone(values.evaluation_time)
+        self.assertIsNone(values.record)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+#
+# Authors:
+# Caner Candan <caner@candan.fr>, http://caner.candan.fr
+#
+
+
+import sys, os, io, shutil, tempfile, unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import common, journal, plans
+
+def job(name, manglename, num):
+    return {'NAME': name, 'MANGLENAME': manglename, 'NUM': num, 'CORESIZE': 1,
+            'RES_FILENAME': 'Res/%s_%s.out.%d' % (name, manglename, num)}
+
+class TestPlan(unittest.TestCase):
+    def setUp(self):
+        self.plan = plans.Plan()
+
+        for manglename, popsize in [('P10', 10), ('P20', 20), ('P40', 40)]:
+            for num in range(1, 6):
+                self.plan.add(job('n', manglename, num), {'POPSIZE': popsize, 'GENMAX': 10})
+
+    def test_job(self):
+        with self.assertRaises(TypeError):
+            next(iter(self.plan))['NUM'] = 0
+
+    def test_io(self):
+        f = io.StringIO()
+        self.plan.write(f)
+        f.seek(0)
+
+        self.assertEqual(list(plans.Plan.read(f)), list(self.plan))
+
+    def test_costs(self):
+        costs = plans.costs(self.plan)
+        self.assertEqual(costs[:5], [100.] * 5)
+        self.assertEqual(costs[-5:], [400.] * 5)
+
+        # the cells known give the scale of the others
+        costs = plans.costs(self.plan, {('n', 'P10'): 2.})
+        self.assertEqual(costs[:5], [2.] * 5)
+        self.assertAlmostEqual(costs[-1], 8.)
+
+    def test_shard(self):
+        shards = [plans.shard(self.plan, index, 3) for index in range(1, 4)]
+
+        # the shards are a partition of the plan
+        self.assertEqual(sum(len(shard) for shard in shards), 15)
+        self.assertEqual(set().union(*shards), set(job['RES_FILENAME'] for job in self.plan))
+
+        # of about the same cost
+        costs = dict(zip([job['RES_FILENAME'] for job in self.plan], plans.costs(self.plan)))
+        loads = [sum(costs[name] for name in shard) for shard in shards]
+        self.assertLessEqual(max(loads) - min(loads), 400.)
+
+        # the same on every node, whatever the order of the plan
+        reversed_plan = plans.Plan(reversed(list(self.plan)))
+        self.assertEqual([plans.shard(reversed_plan, index, 3) for index in range(1, 4)], shards)
+
+    def test_shard_missing(self):
+        for index, count in [(0, 3), (4, 3)]:
+            with self.assertRaises(ValueError):
+                plans.shard(self.plan, index, count)
+
+    def test_durations(self):
+        f = io.StringIO('[["n", "P10", 1.5], ["n", "P20", 3]]')
+        self.assertEqual(plans.durations(f), {('n', 'P10'): 1.5, ('n', 'P20'): 3})
+
+class TestMerge(unittest.TestCase):
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def shard(self, name, nums):
+        workdir = os.path.join(self.dirname, name)
+        os.makedirs(os.path.join(workdir, 'Res'))
+        os.makedirs(os.path.join(workdir, 'Time'))
+
+        shard = journal.Journal(os.path.join(workdir, 'journal.db'))
+
+        for num in nums:
+            res = os.path.join(workdir, 'Res', 'n_m.out.%d' % num)
+            open(res, 'w').write('%d\n' % num)
+            open(os.path.join(workdir, 'Time', 'n_m.time.%d' % num), 'w').write('{}\n')
+
+            shard.queued({'RES_FILENAME': res, 'NAME': 'n', 'MANGLENAME': 'm', 'NUM': num, 'PROCESS_COMMAND': 'prog > %s' % res})
+
+        return workdir
+
+    def test_merge(self):
+        workdirs = [self.shard('a', [1, 2]), self.shard('b', [3])]
+
+        target = os.path.join(self.dirname, 'all')
+        os.makedirs(target)
+
+        tree = common.AutoFillingDict({'WORKDIR': target, 'RESDIR': os.path.join(target, 'Res'), 'TIMEDIR': os.path.join(target, 'Time'),
+                                       'JOURNAL': journal.Journal(os.path.join(target, 'journal.db'))})
+        plans.merge(workdirs, tree)
+
+        self.assertEqual(sorted(os.listdir(tree['RESDIR'])), ['n_m.out.1', 'n_m.out.2', 'n_m.out.3'])
+        self.assertEqual(sorted(os.listdir(tree['TIMEDIR'])), ['n_m.time.1', 'n_m.time.2', 'n_m.time.3'])
+        self.assertEqual(open(os.path.join(tree['RESDIR'], 'n_m.out.3')).read(), '3\n')
+
+        # the journal of the target knows the jobs of all the shards, under its own paths
+        rows = tree['JOURNAL'].execute('SELECT res_filename, command FROM jobs ORDER BY num')
+        self.assertEqual(rows, [(os.path.join(target, 'Res', 'n_m.out.%d' % num), 'prog > %s' % os.path.join(target, 'Res', 'n_m.out.%d' % num))
+                                for num in [1, 2, 3]])
+
+        # merging again changes nothing
+        plans.merge(workdirs, tree)
+        self.assertEqual(len(tree['JOURNAL'].states()), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+#
+# Authors:
+# Caner Candan <caner@candan.fr>, http://caner.candan.fr
+#
+
+
+import sys, os, shutil, tempfile, unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import journal, records, resume
+
+class TestCompleted(unittest.TestCase):
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.resdir = os.path.join(self.dirname, 'Res')
+        self.timedir = os.path.join(self.dirname, 'Time')
+        os.makedirs(self.resdir)
+        os.makedirs(self.timedir)
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def job(self, num, restart=''):
+        return {'RES_FILENAME': os.path.join(self.resdir, 'n_m.out.%d' % num),
+                'TIME_FILENAME': os.path.join(self.timedir, 'n_m.time.%d' % num), 'RESTART': restart}
+
+    def complete(self, num, status=0, timedout=False, result='Elapsed time: 1s\n', suffix=''):
+        job = self.job(num)
+        open(job['RES_FILENAME'] + suffix, 'w').write(result)
+        open(job['RES_FILENAME'] + '.status', 'w').write('%d\n' % status)
+        records.write(job['TIME_FILENAME'], {'status': status, 'timedout': timedout})
+
+    def test_files(self):
+        self.complete(1)
+        self.complete(2, status=1)
+        self.complete(3, result='')
+        self.complete(4, suffix='.zst')
+        self.complete(5)
+        os.remove(self.job(5)['TIME_FILENAME'])
+        self.complete(6)
+        os.remove(self.job(6)['RES_FILENAME'] + '.status')
+
+        completed = resume.Completed(self.resdir, self.timedir)
+
+        self.assertEqual([num for num in range(1, 8) if self.job(num) in completed], [1, 4])
+
+    def test_restart(self):
+        self.complete(1, status=124)
+        self.complete(2, status=-2, timedout=True)
+
+        completed = resume.Completed(self.resdir, self.timedir)
+
+        self.assertNotIn(self.job(1), completed)
+        self.assertIn(self.job(1, restart='RESTART'), completed)
+        self.assertIn(self.job(2, restart='RESTART'), completed)
+
+    def test_missing(self):
+        completed = resume.Completed(os.path.join(self.dirname, 'None'), os.path.join(self.dirname, 'None'))
+        self.assertNotIn(self.job(1), completed)
+
+    def test_journal(self):
+        self.complete(1)
+        self.complete(2)
+
+        j = journal.Journal(os.path.join(self.dirname, 'journal.db'))
+        j.queued(dict(self.job(1), NAME='n', MANGLENAME='m', NUM=1, PROCESS_COMMAND=''))
+        j.finished(self.job(1), 1)
+
+        completed = resume.Completed(self.resdir, self.timedir, j)
+
+        # the state recorded by the journal wins over the files, the files answer for the jobs it does not know
+        self.assertNotIn(self.job(1), completed)
+        self.assertIn(self.job(2), completed)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+#
+# Authors:
+# Caner Candan <caner@candan.fr>, http://caner.candan.fr
+#
+
+
+import sys, os, shutil, tempfile, unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import solutions
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+
+    def started(self, job):
+        self.calls.append(('started', job['RES_FILENAME']))
+
+    def finished(self, job, status):
+        self.calls.append(('finished', job['RES_FILENAME'], status))
+
+class TestIndex(unittest.TestCase):
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.prefix = os.path.join(self.dirname, 'P1_S48.soln.')
+
+        for name in ['P1_S48.soln.1.1', 'P1_S48.soln.1.3', 'P1_S48.soln.1.last', 'P1_S48.soln.2.2', 'P1_S48.soln.3.last',
+                     'P2_S48.soln.1.1', 'P1_S48.out.1', 'P1_S48.soln.1.1.status']:
+            open(os.path.join(self.dirname, name), 'w').write('%s\n' % name)
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def test_runs(self):
+        index = solutions.Index(self.dirname)
+
+        self.assertEqual(index.runs(self.prefix), {1: {'1', '3', 'last'}, 2: {'2'}, 3: {'last'}})
+        self.assertEqual(index.runs(os.path.join(self.dirname, 'P3_S48.soln.')), {})
+
+    def test_last(self):
+        index = solutions.Index(self.dirname)
+
+        self.assertEqual(index.last(self.prefix), [self.prefix + '1.3', self.prefix + '2.2', self.prefix + '3.last'])
+        self.assertEqual(index.solutions(self.prefix), [self.prefix + '1.1', self.prefix + '1.3', self.prefix + '2.2'])
+
+    def test_finished(self):
+        journal = Recorder()
+        index = solutions.Index(self.dirname, journal=journal)
+        index.runs(self.prefix)
+
+        # the directory is listed once, until a run writing there is finished
+        open(self.prefix + '4.1', 'w').close()
+        os.remove(self.prefix + '2.2')
+        self.assertEqual(sorted(index.runs(self.prefix)), [1, 2, 3])
+
+        index.finished({'RES_FILENAME': 'other', 'PLAN_FILENAME': os.path.join(self.dirname + 'x', 'P1_S48.soln.4')}, 0)
+        self.assertEqual(sorted(index.runs(self.prefix)), [1, 2, 3])
+
+        index.started({'RES_FILENAME': 'run'})
+        index.finished({'RES_FILENAME': 'run', 'PLAN_FILENAME': self.prefix + '4'}, 0)
+        self.assertEqual(sorted(index.runs(self.prefix)), [1, 3, 4])
+
+        self.assertEqual(journal.calls, [('finished', 'other', 0), ('started', 'run'), ('finished', 'run', 0)])
+
+    def test_link(self):
+        index = solutions.Index(self.dirname)
+        index.link()
+
+        self.assertEqual(os.readlink(self.prefix + '1.last'), 'P1_S48.soln.1.3')
+        self.assertEqual(os.readlink(self.prefix + '2.last'), 'P1_S48.soln.2.2')
+        self.assertFalse(os.path.islink(self.prefix + '3.last'))
+        self.assertEqual(open(self.prefix + '2.last').read(), 'P1_S48.soln.2.2\n')
+        self.assertEqual(index.runs(self.prefix)[2], {'2', 'last'})
+
+    def test_save(self):
+        filename = os.path.join(self.dirname, 'solutions.json')
+
+        index = solutions.Index(self.dirname, filename)
+        index.refresh()
+        index.save()
+
+        loaded = solutions.Index(self.dirname, filename)
+        self.assertEqual(loaded.names, index.names)
+        self.assertEqual(loaded.entries, index.entries)
+
+        # the index of another directory is not loaded
+        self.assertEqual(solutions.Index(self.dirname + 'x', filename).names, set())
+
+    def test_lastof(self):
+        self.assertEqual(solutions.lastof({'2', '10', 'last'}), '10')
+        self.assertEqual(solutions.lastof({'last'}), 'last')
+
+if __name__ == '__main__':
+    unittest.main()
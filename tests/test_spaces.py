@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+#
+# Authors:
+# Caner Candan <caner@candan.fr>, http://caner.candan.fr
+#
+
+
+import sys, os, unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import browsers, common, spaces
+
+class TestConstraint(unittest.TestCase):
+    def test_builtins(self):
+        constraint = spaces.constraint('CORESIZE <= min(POPSIZE, 8)')
+
+        self.assertEqual(constraint.names, {'CORESIZE', 'min', 'POPSIZE'})
+        self.assertIs(spaces.constraint('CORESIZE <= min(POPSIZE, 8)'), constraint)
+
+        tree = common.AutoFillingDict({'POPSIZE': 4}).copy()
+        tree['CORESIZE'] = 4
+        self.assertTrue(constraint(tree))
+        tree['CORESIZE'] = 6
+        self.assertFalse(constraint(tree))
+
+    def test_missing(self):
+        # a misspelled key is an error, not an empty string
+        with self.assertRaises(NameError):
+            spaces.constraint('CORESIZ <= 8')(common.AutoFillingDict({'CORESIZE': 1}))
+
+class TestSpace(unittest.TestCase):
+    def setUp(self):
+        self.tree = common.AutoFillingDict({'POPSIZES': [1, 4, 16], 'CORESIZES': [1, 2, 8], 'NRUNS': 2})
+        self.range = browsers.Range(None)
+        self.core = browsers.Core(None, self.range)
+        self.pop = browsers.Pop(None, self.core)
+
+    def test_space(self):
+        space = spaces.Space(self.pop, self.tree)
+
+        self.assertEqual(len(space), 18)
+        self.assertEqual(next(iter(space)), {'POPSIZE': 1, 'CORESIZE': 1, 'NUM': 1})
+
+    def test_constraints(self):
+        self.tree['CONSTRAINTS'] = ['CORESIZE <= POPSIZE', 'NUM <= max(1, CORESIZE)']
+
+        # each constraint is checked by the browser binding the last of its keys
+        self.assertEqual(self.pop.checks(self.tree), [])
+        self.assertEqual([c.expression for c in self.core.checks(self.tree)], ['CORESIZE <= POPSIZE'])
+        self.assertEqual([c.expression for c in self.range.checks(self.tree)], ['NUM <= max(1, CORESIZE)'])
+
+        space = list(spaces.Space(self.pop, self.tree))
+
+        self.assertEqual(len(space), 9)
+        self.assertTrue(all(run['CORESIZE'] <= run['POPSIZE'] and run['NUM'] <= run['CORESIZE'] for run in space))
+
+    def test_below(self):
+        self.assertEqual(self.pop.below(), {'CORESIZE', 'NUM'})
+        self.assertEqual(self.range.below(), set())
+        self.assertTrue(self.pop.reaches(browsers.Range))
+        self.assertFalse(self.core.reaches(browsers.Pop))
+
+    def test_reach(self):
+        execute = browsers.Execute(None)
+        self.range.add(execute)
+        self.tree['CONSTRAINTS'] = ['CORESIZE <= POPSIZE']
+
+        reached = spaces.Space(self.pop, self.tree).reach(browsers.Execute)
+
+        self.assertEqual(len(reached), 12)
+        self.assertTrue(all(browser is execute for browser, _, _ in reached))
+        self.assertEqual([inner for _, _, inner in reached[:2]], [{'NUM': 1}, {'NUM': 2}])
+
+        # the runs of a cell share the keys bound above them
+        self.assertIs(reached[0][1], reached[1][1])
+        self.assertEqual(reached[0][1], {'POPSIZE': 1, 'CORESIZE': 1})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,7 +16,7 @@
 # Caner Candan <caner@candan.fr>, http://caner.candan.fr
 #
 
-import common
+import common, metrics
 
 class Tracer(common.Base):
     """
@@ -83,7 +83,7 @@ class Easy(Tracer):
             if first: func(first)
             elif second: func(second)
 
-        tree['MANGLENAME'] = '%(MANGLENAME_PATTERN)s' % tree % tree
+        tree['MANGLENAME'] = common.expand(tree, 'MANGLENAME_PATTERN')
         tree['FILENAME'] = '%(NAME)s_%(MANGLENAME)s' % tree
 
         if self.title: tree['TITLE'] = self.title.replace(' ', '_')
@@ -132,7 +132,7 @@ class AbsoluteTimeProportions(Tracer):
                         data = []
 
                         for tree['POPSIZE'] in tree['POPSIZES']:
-                            tree['MANGLENAME'] = '%(MANGLENAME_PATTERN)s' % tree % tree
+                            tree['MANGLENAME'] = common.expand(tree, 'MANGLENAME_PATTERN')
 
                             data.append(eval(open('%(GRAPHDIR)s/%(TITLE)s_%(NAME)s_%(MANGLENAME)s.time' % tree).readline()))
 
@@ -163,7 +163,7 @@ class AbsoluteTimeProportions(Tracer):
                 for ax in axes: ax.set_ybound(max_bound)
 
                 if not tree['PLOT_ON_WINDOW']:
-                    tree['MANGLENAME'] = '%(MANGLENAME_PATTERN)s' % tree % tree
+                    tree['MANGLENAME'] = common.expand(tree, 'MANGLENAME_PATTERN')
                     tree['FILENAME'] = '%(MANGLENAME)s.pdf' % tree
                     fig.savefig('%(GRAPHDIR)s/TimeRatesByOperator_%(FILENAME)s' % tree, format='pdf', dpi=280)
 
@@ -209,7 +209,7 @@ class AbsoluteTimeProportionsPerCores(Tracer):
                         data = []
 
                         for tree['CORESIZE'] in tree['CORESIZES']:
-                            tree['MANGLENAME'] = '%(MANGLENAME_PATTERN)s' % tree % tree
+                            tree['MANGLENAME'] = common.expand(tree, 'MANGLENAME_PATTERN')
 
                             data.append(eval(open('%(GRAPHDIR)s/%(TITLE)s_%(NAME)s_%(MANGLENAME)s.time' % tree).readline()))
 
@@ -241,7 +241,7 @@ class AbsoluteTimeProportionsPerCores(Tracer):
                 for ax in axes: ax.set_ybound(min_bound, max_bound)
 
                 if not tree['PLOT_ON_WINDOW']:
-                    tree['MANGLENAME'] = '%(MANGLENAME_PATTERN)s' % tree % tree
+                    tree['MANGLENAME'] = common.expand(tree, 'MANGLENAME_PATTERN')
                     tree['FILENAME'] = '%(MANGLENAME)s.pdf' % tree
                     fig.savefig('%(GRAPHDIR)s/TimeRatesByOperator_%(FILENAME)s' % tree, format='pdf', dpi=280)
 
@@ -326,53 +326,38 @@ class GlobalTimeSpeedup(Tracer):
                         for tree['POPSIZE'] in tree['POPSIZES']:
                             otree['POPSIZE'] = tree['POPSIZE']
 
-                            tree['MANGLENAME'] = '%(MANGLENAME_PATTERN)s' % tree % tree
-                            otree['MANGLENAME'] = '%(MANGLENAME_PATTERN)s' % otree % otree
+                            tree['MANGLENAME'] = common.expand(tree, 'MANGLENAME_PATTERN')
+                            otree['MANGLENAME'] = common.expand(otree, 'MANGLENAME_PATTERN')
 
-                            idx = tree['GLOBAL_TIME_IDX']
                             times = []
                             otimes = []
 
                             for tree['NUM'] in range(1, tree['NRUNS']+1):
                                 otree['NUM'] = tree['NUM']
 
-                                tree['RES_FILENAME'] = '%(RESFILENAME_PATTERN)s' % tree % tree
-                                otree['RES_FILENAME'] = '%(RESFILENAME_PATTERN)s' % otree % otree
+                                tree['RES_FILENAME'] = common.expand(tree, 'RESFILENAME_PATTERN')
+                                otree['RES_FILENAME'] = common.expand(otree, 'RESFILENAME_PATTERN')
 
-                                tree['TIME_FILENAME'] = '%(TIMEFILENAME_PATTERN)s' % tree % tree
-                                otree['TIME_FILENAME'] = '%(TIMEFILENAME_PATTERN)s' % otree % otree
+                                tree['TIME_FILENAME'] = common.expand(tree, 'TIMEFILENAME_PATTERN')
+                                otree['TIME_FILENAME'] = common.expand(otree, 'TIMEFILENAME_PATTERN')
+
+                                run = metrics.read(tree)
+                                orun = metrics.read(otree)
 
                                 global_time = None
                                 oglobal_time = None
 
                                 if self.rate:
-                                    idx_time = tree['TIME_IDX']
-                                    data_time = open(tree['TIME_FILENAME']).readlines()
-                                    if len(data_time) <= idx_time: continue
-                                    if 'Elapsed (wall clock) time' not in data_time[idx_time]: continue
-
-                                    odata_time = open(otree['TIME_FILENAME']).readlines()
-                                    if len(odata_time) <= idx_time: continue
-                                    if 'Elapsed (wall clock) time' not in odata_time[idx_time]: continue
-
-                                    global_time = data_time[idx_time].split()[-1][:-1].split(':')
-                                    global_time = float(int(global_time[0]) * 60 + float(global_time[1]))
-
-                                    oglobal_time = data_time[idx_time].split()[-1][:-1].split(':')
-                                    oglobal_time = float(int(oglobal_time[0]) * 60 + float(oglobal_time[1]))
-
-
-                                local_data = open(tree['RES_FILENAME']).readlines()
-                                olocal_data = open(otree['RES_FILENAME']).readlines()
+                                    if not run.record or 'wall' not in run.record: continue
+                                    if not orun.record or 'wall' not in orun.record: continue
 
-                                if len(local_data) <= idx: continue
-                                if self.pattern not in local_data[idx]: continue
+                                    global_time = float(run.record['wall'])
+                                    oglobal_time = float(orun.record['wall'])
 
-                                if len(olocal_data) <= idx: continue
-                                if self.pattern not in olocal_data[idx]: continue
+                                time = run.field(self.pattern)
+                                otime = orun.field(self.pattern)
 
-                                time = float(local_data[idx].split()[-1][:-1])
-                                otime = float(olocal_data[idx].split()[-1][:-1])
+                                if time is None or otime is None: continue
 
                                 if self.rate:
                                     times.append(time/global_time)
@@ -406,7 +391,7 @@ class GlobalTimeSpeedup(Tracer):
                     if tree['YBOUND']: ax.set_ybound(0, tree['YBOUND'])
 
                 if not tree['PLOT_ON_WINDOW']:
-                    tree['MANGLENAME'] = '%(MANGLENAME_PATTERN)s' % tree % tree
+                    tree['MANGLENAME'] = common.expand(tree, 'MANGLENAME_PATTERN')
                     tree['FILENAME'] = '%(MANGLENAME)s.pdf' % tree
                     fig.savefig('%(GRAPHDIR)s/GlobalTimeSpeedup_%(FILENAME)s' % tree, format='pdf', dpi=280)
 
@@ -450,7 +435,7 @@ class GlobalEfficiency(Tracer):
                     data = []
 
                     for tree['POPSIZE'] in tree['POPSIZES']:
-                        tree['MANGLENAME'] = '%(MANGLENAME_PATTERN)s' % tree % tree
+                        tree['MANGLENAME'] = common.expand(tree, 'MANGLENAME_PATTERN')
 
                         data.append(eval(open('%(GRAPHDIR)s/%(TITLE)s_%(NAME)s_%(MANGLENAME)s.data' % tree).readline()))
 
@@ -477,7 +462,7 @@ class GlobalEfficiency(Tracer):
                     elif second: func(second)
 
                 if not tree['PLOT_ON_WINDOW']:
-                    tree['MANGLENAME'] = '%(MANGLENAME_PATTERN)s' % tree % tree
+                    tree['MANGLENAME'] = common.expand(tree, 'MANGLENAME_PATTERN')
                     tree['FILENAME'] = '%(MANGLENAME)s.pdf' % tree
                     fig.savefig('%(GRAPHDIR)s/GlobalEfficiency_%(FILENAME)s' % tree, format='pdf', dpi=280)
 
@@ -527,7 +512,7 @@ class MultiInstance(Tracer):
 
                     itemB, tabB = self.keysB
                     for tree[itemB] in tree[tabB]:
-                        tree['MANGLENAME'] = '%(MANGLENAME_PATTERN)s' % tree % tree
+                        tree['MANGLENAME'] = common.expand(tree, 'MANGLENAME_PATTERN')
 
                         data.append(eval(open('%(GRAPHDIR)s/%(TITLE)s_%(NAME)s_%(MANGLENAME)s.data' % tree).readline()))
 
@@ -553,7 +538,7 @@ class MultiInstance(Tracer):
                     elif second: func(second)
 
                 if not tree['PLOT_ON_WINDOW']:
-                    tree['MANGLENAME'] = '%(MANGLENAME_PATTERN)s' % tree % tree
+                    tree['MANGLENAME'] = common.expand(tree, 'MANGLENAME_PATTERN')
                     tree['FILENAME'] = '%(MANGLENAME)s.pdf' % tree
                     fig.savefig('%(GRAPHDIR)s/GlobalEfficiency_%(FILENAME)s' % tree, format='pdf', dpi=280)
 
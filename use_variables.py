@@ -8,34 +8,14 @@ import tracers_variables as t
 
 logger = logging.getLogger("use_variables")
 
-class ExecutePlan(b.Browser):
-    def __init__(self, parser, stat=None):
-        b.Browser.__init__(self, parser, stat=stat)
-
-    def browse(self, options, tree):
-        tree['MANGLENAME'] = '%(MANGLENAME_PATTERN)s' % tree % tree
-        tree['TIME_FILENAME'] = '%(TIMEFILENAME_PATTERN)s' % tree % tree
-        tree['RES_FILENAME'] = '%(RESFILENAME_PATTERN)s' % tree % tree
-        tree['PLAN_FILENAME'] = '%(PLANFILENAME_PATTERN)s' % tree % tree
-        tree['PROCESS_COMMAND'] = '%(COMMAND_PATTERN)s' % tree % tree
-
-        self.logger.debug('%(PROCESS_COMMAND)s' % tree)
-
-        if tree['EXECUTE']:
-            p = subprocess.Popen('%(PROCESS_COMMAND)s' % tree, shell=True)
-            p.wait()
-
-        self.browseAll(tree)
-
 class SampleDomain(b.Browser):
+    keys = ('NAME', 'DOMAIN', 'INSTANCE')
+
     def __init__(self, parser, browser=None):
         b.Browser.__init__(self, parser, browser)
 
-    def browse(self, options, tree):
-        tree['PROGRESSBAR_SIZE'] *= len(tree['SAMPLES'])
-
-        for tree['NAME'], tree['DOMAIN'], tree['INSTANCE'] in tree['SAMPLES']:
-            self.browseAll(tree)
+    def bindings(self, tree):
+        return tree['SAMPLES']
 
 def main():
 
@@ -48,7 +28,7 @@ def main():
     pop = b.Pop(parser)
     core = b.Core(parser)
     sample = b.Sample(parser)
-    execute = ExecutePlan(parser)
+    execute = b.Execute(parser)
     start = b.Restart(parser)
 
     evaluationTimeTracer = t.Easy(parser)